@@ -0,0 +1,142 @@
+import os, zlib, zipfile, tempfile
+from collections import namedtuple
+from contextlib import contextmanager
+
+# ---------------------------
+# 압축 파일 검사
+# ---------------------------
+# zip은 중앙 디렉터리, 7z는 헤더에 기록된 CRC를 읽는다. 아카이브는 한 번만 열고
+# 허용 확장자 중 가장 큰 항목을 대표 ROM으로 고른다. 헤더에 CRC가 없을 때만 압축을 푼다.
+ARCHIVE_EXTS = (".zip", ".7z")
+STREAM_CHUNK = 4 * 1024 * 1024
+
+ArchiveEntry = namedtuple("ArchiveEntry", "name size crc")
+
+
+class ArchiveError(Exception):
+    pass
+
+
+@contextmanager
+def _open_7z(path):
+    # py7zr은 import만으로 수십 ms가 걸리므로 7z를 처음 열 때 불러온다
+    import py7zr
+    from py7zr import exceptions
+    try:
+        with py7zr.SevenZipFile(path, "r") as archive:
+            yield archive
+    except (exceptions.ArchiveError, exceptions.PasswordRequired,
+            exceptions.UnsupportedCompressionMethodError) as e:
+        raise ArchiveError(f"{path}: {e}") from e
+
+
+def is_archive(path):
+    return path.lower().endswith(ARCHIVE_EXTS)
+
+
+def _ext(name):
+    return os.path.splitext(name)[1].lower().strip(".")
+
+
+def primary_entry(entries, allowed_exts):
+    valid = [e for e in entries if _ext(e.name) in allowed_exts]
+    if not valid:
+        return None
+    # 크기가 같으면 이름순으로 첫 번째 (실행마다 같은 항목을 고르도록)
+    return min(valid, key=lambda e: (-e.size, e.name))
+
+
+def _zip_entries(z):
+    return [ArchiveEntry(info.filename, info.file_size, info.CRC)
+            for info in z.infolist() if not info.is_dir()]
+
+
+def _7z_entries(archive):
+    return [ArchiveEntry(info.filename, info.uncompressed, info.crc32)
+            for info in archive.list() if not info.is_directory]
+
+
+def _crc_of_stream(f):
+    prev = 0
+    for chunk in iter(lambda: f.read(STREAM_CHUNK), b""):
+        prev = zlib.crc32(chunk, prev)
+    return prev
+
+
+def _open_zip(path):
+    try:
+        return zipfile.ZipFile(path, "r")
+    except zipfile.BadZipFile as e:
+        raise ArchiveError(f"{path}: {e}") from e
+
+
+class _CrcSink:
+    # py7zr 출력 대상(Py7zIO와 같은 메서드). 받은 데이터는 CRC만 갱신하고 버린다
+    def __init__(self):
+        self.crc = 0
+        self._size = 0
+
+    def write(self, data):
+        self.crc = zlib.crc32(data, self.crc)
+        self._size += len(data)
+        return len(data)
+
+    def read(self, size=None):
+        return b""
+
+    def seek(self, offset, whence=0):
+        return 0
+
+    def flush(self):
+        pass
+
+    def size(self):
+        return self._size
+
+    def close(self):
+        pass
+
+
+class _CrcSinkFactory:
+    def __init__(self):
+        self.sinks = []
+
+    def create(self, filename):
+        sink = _CrcSink()
+        self.sinks.append(sink)
+        return sink
+
+
+def _7z_member_crc(archive, name):
+    # 헤더에 CRC가 없는 항목만 풀면서 CRC를 계산한다. 항목 전체를 메모리에 올리지 않는다
+    try:
+        import py7zr.io  # noqa: F401  (extract(factory=)를 지원하는 py7zr)
+    except ImportError:
+        # 예전 py7zr: 임시 폴더에 풀고 파일을 나눠 읽는다 (read()는 BytesIO에 통째로 푼다)
+        with tempfile.TemporaryDirectory(prefix="pegasus-7z-") as tmp:
+            archive.extract(path=tmp, targets=[name])
+            with open(os.path.join(tmp, name), "rb") as f:
+                return _crc_of_stream(f)
+    factory = _CrcSinkFactory()
+    archive.extract(targets=[name], factory=factory)
+    return factory.sinks[0].crc if factory.sinks else 0
+
+
+def inspect_archive(path, allowed_exts):
+    # (대표 항목 이름, "%08X" CRC) 또는 None. 깨진 압축 파일은 ArchiveError
+    if path.lower().endswith(".zip"):
+        with _open_zip(path) as z:
+            entry = primary_entry(_zip_entries(z), allowed_exts)
+            if entry is None:
+                return None
+            return entry.name, "%08X" % entry.crc
+
+    with _open_7z(path) as archive:
+        entry = primary_entry(_7z_entries(archive), allowed_exts)
+        if entry is None:
+            return None
+        crc = entry.crc
+        if crc is None:
+            # 최후 수단: 해당 항목만 풀어서 계산
+            crc = _7z_member_crc(archive, entry.name)
+        return entry.name, "%08X" % (crc & 0xFFFFFFFF)
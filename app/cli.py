@@ -0,0 +1,205 @@
+import os, sys, json, time, argparse, threading
+
+from app import config
+
+# ---------------------------
+# pegasus-meta (Qt 없이 실행하는 배치 모드)
+# ---------------------------
+# 여러 시스템 폴더를 한 번에 generate/update 하며 해시 캐시와 DB 연결은 공유한다.
+# 진행 상황은 stdout에 JSON 한 줄씩 출력한다.
+#   python -m app.cli generate /roms/gba /roms/snes
+#   python -m app.cli update /roms/*
+#   python -m app.cli library /roms --io-limit 2
+#   python -m app.cli watch /roms/gba
+#   python -m app.cli prune /roms/gba
+PROGRESS_INTERVAL = 1.0
+
+
+_emit_lock = threading.Lock()
+
+
+def emit(event, **fields):
+    fields["event"] = event
+    line = json.dumps(fields, ensure_ascii=False) + "\n"
+    with _emit_lock:
+        sys.stdout.write(line)
+        sys.stdout.flush()
+
+
+class Reporter:
+    # 폴더별 start/progress/done 이벤트. 여러 스레드에서 불려도 된다
+    def __init__(self, append):
+        self.mode = "update" if append else "generate"
+        self.started = {}
+        self.last = {}
+        self.games = {}
+
+    def start(self, folder, chosen):
+        self.started[folder] = time.monotonic()
+        self.last[folder] = 0.0
+        self.games[folder] = 0
+        emit("start", folder=folder, system=chosen["sysname"], core=chosen["core"], mode=self.mode)
+
+    def progress(self, folder, p):
+        now = time.monotonic()
+        if now - self.last[folder] < PROGRESS_INTERVAL and p.done < p.total:
+            return
+        self.last[folder] = now
+        emit("progress", folder=folder, done=p.done, total=p.total,
+             files_per_sec=round(p.files_per_sec, 1), bytes_per_sec=round(p.bytes_per_sec),
+             eta=round(p.eta, 1))
+
+    def result(self, folder, rom, name):
+        self.games[folder] += 1
+
+    def done(self, folder, ok, error=None):
+        if error is not None:
+            emit("error", folder=folder, message=str(error))
+        emit("done", folder=folder, ok=ok, games=self.games[folder],
+             seconds=round(time.monotonic() - self.started[folder], 3))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="pegasus-meta",
+                                     description="metadata.pegasus.txt 일괄 생성/업데이트")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("generate", "metadata.pegasus.txt를 새로 생성"),
+                            ("update", "추가/변경/삭제된 ROM만 반영")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("folders", nargs="+")
+        p.add_argument("--core", help="폴더에 맞는 코어가 여럿일 때 fullname 또는 core 파일명")
+        p.add_argument("--workers", type=int, default=None, help="해시 워커 수 (기본: CPU 수)")
+    p = sub.add_parser("library", help="라이브러리 루트 아래 시스템 폴더를 모두 동시에 처리")
+    p.add_argument("root")
+    p.add_argument("--update", action="store_true", help="generate 대신 update")
+    p.add_argument("--core", help="폴더에 맞는 코어가 여럿일 때 fullname 또는 core 파일명")
+    p.add_argument("--workers", type=int, default=None, help="공유 해시 워커 수 (기본: CPU 수)")
+    p.add_argument("--io-limit", type=int, default=None,
+                   help="동시에 읽는 파일 수 상한 (HDD/NAS는 1~2 권장)")
+    p.add_argument("--parallel", type=int, default=8, help="동시에 처리할 시스템 폴더 수")
+    p = sub.add_parser("prune", help="지워지거나 바뀐 파일의 해시 캐시 행 정리")
+    p.add_argument("folders", nargs="*", help="이 폴더 아래만 (기본: 캐시 전체)")
+    p = sub.add_parser("watch", help="폴더를 감시하며 계속 갱신 (python -m app.watcher와 같음)")
+    p.add_argument("folders", nargs="+")
+    p.add_argument("--core", help="폴더에 맞는 코어가 여럿일 때 fullname 또는 core 파일명")
+    p.add_argument("--debounce", type=float, default=2.0)
+    p.add_argument("--poll", action="store_true",
+                   help="inotify 대신 주기적 stat 비교 (네트워크 공유는 자동으로 폴링)")
+    p.add_argument("--interval", type=float, default=5.0, help="폴링 주기(초)")
+    parser.add_argument("--db", default=config.OPENVGDB_PATH, help="openvgdb.sqlite 경로")
+    parser.add_argument("--hash-db", default=config.HASH_DB_PATH, help="해시 캐시 경로")
+    parser.add_argument("--appjs", default=config.APPJS_PATH, help="app.js 경로")
+    parser.add_argument("--crc-table", default=config.CRC_TABLE_PATH,
+                        help="scripts/export_crc_table.py로 만든 CRC 테이블 (없으면 SQLite 조회)")
+    parser.add_argument("--query-cache", default=config.QUERY_CACHE_PATH,
+                        help="OpenVGDB 조회 결과 캐시 경로")
+    parser.add_argument("--metrics", action="store_true",
+                        help="단계별 로그(JSON, stderr)와 끝에 요약 표 출력")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="cProfile 결과 저장. 해시도 호출 스레드에서 실행한다 (workers=0)")
+    return parser
+
+
+def run_folder(folder, chosen, store, db, append, workers):
+    from app.generate import write_metadata
+    out_file = os.path.join(folder, config.METADATA_NAME)
+    reporter = Reporter(append)
+    reporter.start(folder, chosen)
+    try:
+        ok = write_metadata(folder, chosen, out_file, store, db.lookup_many, append=append,
+                            workers=workers, on_progress=lambda p: reporter.progress(folder, p),
+                            on_result=lambda rom, name: reporter.result(folder, rom, name),
+                            lookup_hashes=db.lookup_hashes)
+    except Exception as e:
+        # 한 폴더의 오류로 나머지 폴더까지 멈추지 않게 error/done 이벤트만 남긴다
+        reporter.done(folder, False, e)
+        return False
+    reporter.done(folder, ok)
+    return ok
+
+
+def run_library_command(args, cores):
+    from app.hashstore import HashStore
+    from app.library import discover_systems, run_library
+    from app.openvgdb import OpenVGDB
+
+    systems = discover_systems(os.path.abspath(args.root), cores, args.core)
+    if not systems:
+        emit("error", folder=args.root, message="no system folders found")
+        return 1
+    emit("library", root=os.path.abspath(args.root), systems=len(systems),
+         bytes=sum(size for _, _, size in systems))
+    reporter = Reporter(args.update)
+    with HashStore(args.hash_db) as store, OpenVGDB(args.db, args.query_cache, args.crc_table) as db:
+        results = run_library(systems, store, db, append=args.update, workers=args.workers,
+                              io_limit=args.io_limit, parallel=args.parallel,
+                              on_start=reporter.start, on_done=reporter.done,
+                              on_progress=reporter.progress, on_result=reporter.result)
+    return 0 if all(results.values()) else 1
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    from app.metrics import METRICS, enable_logging, print_summary, profiled
+
+    if args.metrics:
+        enable_logging()
+    if args.profile and getattr(args, "workers", 0) is None:
+        args.workers = 0
+    with profiled(args.profile):
+        code = run_command(args)
+    if args.metrics:
+        snapshot = METRICS.snapshot()
+        emit("metrics", **snapshot)
+        print_summary(snapshot)
+    return code
+
+
+def run_prune_command(args):
+    from app.hashstore import HashStore
+
+    with HashStore(args.hash_db) as store:
+        for folder in [os.path.abspath(f) for f in args.folders] or [None]:
+            started = time.monotonic()
+            removed = store.prune(folder)
+            emit("prune", folder=folder, removed=removed,
+                 seconds=round(time.monotonic() - started, 3))
+    return 0
+
+
+def run_command(args):
+    from app.cores import get_registry, pick_core
+
+    if args.command == "prune":
+        return run_prune_command(args)
+    cores = get_registry(args.appjs)
+    if args.command == "watch":
+        from app.watcher import run_watch
+        return run_watch(args, cores)
+    if args.command == "library":
+        return run_library_command(args, cores)
+    jobs = []
+    failed = False
+    for folder in args.folders:
+        folder = os.path.abspath(folder)
+        chosen = pick_core(cores, folder, args.core)
+        if chosen is None:
+            emit("error", folder=folder, message="no core for folder")
+            failed = True
+            continue
+        jobs.append((folder, chosen))
+    if not jobs:
+        return 1
+
+    from app.hashstore import HashStore
+    from app.openvgdb import OpenVGDB
+
+    with HashStore(args.hash_db) as store, OpenVGDB(args.db, args.query_cache, args.crc_table) as db:
+        for folder, chosen in jobs:
+            if not run_folder(folder, chosen, store, db, args.command == "update", args.workers):
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+import os
+from pathlib import Path
+
+# ---------------------------
+# 경로 설정 (.env 또는 환경 변수)
+# ---------------------------
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _load_env(path):
+    # python-dotenv 대신 KEY=VALUE만 읽는다 (import 비용 없이 CLI 시작을 빠르게)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        os.environ.setdefault(key.strip(), value.strip().strip("'\""))
+
+
+_load_env(ROOT / ".env")
+
+
+def _path(name, default):
+    path = Path(os.environ.get(name, default))
+    return str(path if path.is_absolute() else ROOT / path)
+
+
+OPENVGDB_PATH = _path("OPENVGDB_PATH", "data/openvgdb.sqlite")
+APPJS_PATH = _path("APPJS_PATH", "data/app.js")
+HASH_DB_PATH = _path("HASH_DB_PATH", "data/crc_cache.sqlite")
+CRC_TABLE_PATH = _path("CRC_TABLE_PATH", "data/openvgdb.crc")
+QUERY_CACHE_PATH = _path("QUERY_CACHE_PATH", "data/query_cache.json")
+METADATA_NAME = "metadata.pegasus.txt"
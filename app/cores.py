@@ -0,0 +1,149 @@
+import os, re, json, hashlib
+
+# ---------------------------
+# app.js 파싱
+# ---------------------------
+BLOCK_RE = re.compile(r"\{[^}]+\}")
+FIELD_RE = {name: re.compile(name + r'\s*:\s*"([^"]+)"')
+            for name in ("fullname", "sysname", "exts", "abbr", "core")}
+
+
+def parse_appjs(content):
+    cores = []
+    for m in BLOCK_RE.findall(content):
+        fullname = FIELD_RE["fullname"].search(m)
+        sysname = FIELD_RE["sysname"].search(m)
+        exts = FIELD_RE["exts"].search(m)
+        abbr = FIELD_RE["abbr"].search(m)
+        core = FIELD_RE["core"].search(m)
+        if fullname and core:
+            cores.append({
+                "fullname": fullname.group(1),
+                "sysname": sysname.group(1) if sysname else "",
+                "exts": [e.strip() for e in exts.group(1).split(",")] if exts else [],
+                "abbr": abbr.group(1) if abbr else "",
+                "core": core.group(1)
+            })
+    return cores
+
+
+def load_cores_from_appjs(appjs_path):
+    if not os.path.exists(appjs_path):
+        return []
+    with open(appjs_path, "r", encoding="utf-8") as f:
+        return parse_appjs(f.read())
+
+
+# ---------------------------
+# 코어 레지스트리 (abbr / 확장자 / sysname 인덱스)
+# ---------------------------
+class CoreRegistry:
+    def __init__(self, cores):
+        self.cores = cores
+        self.by_abbr = {}
+        self.by_ext = {}
+        self.by_sysname = {}
+        for c in cores:
+            self.by_abbr.setdefault(c["abbr"].lower(), []).append(c)
+            self.by_sysname.setdefault(c["sysname"], []).append(c)
+            for ext in c["exts"]:
+                self.by_ext.setdefault(ext.lower().lstrip("."), []).append(c)
+
+    def __iter__(self):
+        return iter(self.cores)
+
+    def __len__(self):
+        return len(self.cores)
+
+    def for_abbr(self, abbr):
+        return self.by_abbr.get(abbr.lower(), [])
+
+    def for_ext(self, ext):
+        return self.by_ext.get(ext.lower().lstrip("."), [])
+
+    def for_sysname(self, sysname):
+        return self.by_sysname.get(sysname, [])
+
+    def for_folder(self, folder):
+        return self.for_abbr(os.path.basename(os.path.normpath(folder)))
+
+
+# ---------------------------
+# 파싱 결과 캐시
+# ---------------------------
+# app.js를 매번 정규식으로 읽지 않고 파싱 결과를 JSON으로 저장해 둔다.
+# 크기/mtime이 같으면 그대로 쓰고, 다르면 내용 해시를 비교해서 바뀐 경우에만 다시 파싱한다.
+CACHE_VERSION = 1
+
+
+def default_cache_path(appjs_path):
+    return os.path.splitext(appjs_path)[0] + ".cores.json"
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return None
+    return cache
+
+
+def _write_cache(cache_path, cache):
+    tmp = cache_path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, cache_path)
+    except OSError:
+        # 캐시는 없어도 동작한다 (읽기 전용 위치 등)
+        pass
+
+
+def load_registry(appjs_path, cache_path=None):
+    cache_path = cache_path or default_cache_path(appjs_path)
+    try:
+        st = os.stat(appjs_path)
+    except OSError:
+        return CoreRegistry([])
+    cache = _read_cache(cache_path)
+    if cache and cache["size"] == st.st_size and cache["mtime_ns"] == st.st_mtime_ns:
+        return CoreRegistry(cache["cores"])
+
+    with open(appjs_path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()
+    if cache and cache["sha1"] == digest:
+        cores = cache["cores"]
+    else:
+        cores = parse_appjs(data.decode("utf-8"))
+    _write_cache(cache_path, {"version": CACHE_VERSION, "size": st.st_size,
+                              "mtime_ns": st.st_mtime_ns, "sha1": digest, "cores": cores})
+    return CoreRegistry(cores)
+
+
+_registries = {}
+
+
+def get_registry(appjs_path, cache_path=None):
+    # 처음 쓸 때 한 번만 읽는다
+    registry = _registries.get(appjs_path)
+    if registry is None:
+        registry = _registries[appjs_path] = load_registry(appjs_path, cache_path)
+    return registry
+
+def cores_for_folder(cores, folder):
+    # 폴더 이름(소문자)과 abbr이 같은 코어들
+    if isinstance(cores, CoreRegistry):
+        return cores.for_folder(folder)
+    key = os.path.basename(os.path.normpath(folder)).lower()
+    return [c for c in cores if c["abbr"] == key]
+
+def pick_core(cores, folder, name=None):
+    # name이 있으면 fullname 또는 core 파일명이 같은 후보, 없으면 첫 번째 후보
+    candidates = cores_for_folder(cores, folder)
+    if name:
+        candidates = [c for c in candidates if name in (c["fullname"], c["core"])]
+    return candidates[0] if candidates else None
@@ -0,0 +1,154 @@
+import os, sys, mmap, sqlite3, struct
+from array import array
+from bisect import bisect_left
+from app.metrics import METRICS
+
+# ---------------------------
+# CRC -> 릴리스 정보 테이블 (mmap)
+# ---------------------------
+# OpenVGDB에서 CRC 조회에 필요한 열만 뽑아 파일 하나로 만든다 (scripts/export_crc_table.py).
+#   헤더 | CRC 키 (정렬된 uint32 N개) | 레코드 (uint32 x 3, N개) | 문자열 테이블 (UTF-8)
+# 레코드 = (플래그, 오프셋, 길이). 문자열 하나에 name, genre, developer, description, system을
+# \0으로 이어 붙여 두어 조회 한 번에 슬라이스/디코드도 한 번만 한다. 빈 값은 None.
+# 실행 중에는 파일을 mmap하고 키 배열에서 이진 탐색만 하므로 SQLite 조인도, 메모리 적재도 없다.
+MAGIC = b"PGCRC\x00\x01\x00"
+HEADER = struct.Struct("<8s1s3xIIII64s")   # magic, 바이트 순서, N, 키/레코드/문자열 위치, DB 식별자
+HEADER_SIZE = 128
+FIELDS = ("name", "genre", "developer", "description", "system")
+RECORD = struct.Struct("=III")
+FLAG_AMBIGUOUS = 1
+
+EXPORT_SQL = """
+    SELECT r.romHashCRC, r.romID, rl.releaseTitleName, rl.releaseGenre, rl.releaseDeveloper,
+           rl.releaseDescription, rl.TEMPsystemName
+    FROM ROMs r
+    JOIN RELEASES rl ON r.romID = rl.romID
+    WHERE r.romHashCRC IS NOT NULL AND r.romHashCRC != ''
+    ORDER BY rl.releaseID
+"""
+
+
+class CrcTableError(Exception):
+    pass
+
+
+def export_crc_table(db_path, out_path, identity=""):
+    # identity: 원본 DB 식별자 (querycache.db_identity). 달라지면 OpenVGDB가 테이블을 쓰지 않는다
+    keys = array("I")
+    records = array("I")
+    strings = bytearray()
+
+    # 같은 CRC는 첫 릴리스를 쓰고, 다른 ROM(romID)과 겹치면 플래그만 세운다
+    first = {}
+    db = sqlite3.connect(db_path)
+    try:
+        for crc_text, rom_id, *values in db.execute(EXPORT_SQL):
+            try:
+                crc = int(crc_text, 16)
+            except ValueError:
+                continue
+            if crc > 0xFFFFFFFF:
+                continue
+            row = first.get(crc)
+            if row is None:
+                first[crc] = [0, rom_id, [(v or "").replace("\0", "") for v in values]]
+            elif row[1] != rom_id:
+                row[0] |= FLAG_AMBIGUOUS
+    finally:
+        db.close()
+
+    for crc in sorted(first):
+        flags, _, values = first[crc]
+        data = "\0".join(values).encode("utf-8")
+        keys.append(crc)
+        records.extend((flags, len(strings), len(data)))
+        strings.extend(data)
+
+    keys_off = HEADER_SIZE
+    records_off = keys_off + len(keys) * keys.itemsize
+    strings_off = records_off + len(records) * records.itemsize
+    header = HEADER.pack(MAGIC, sys.byteorder[0].encode(), len(keys), keys_off, records_off,
+                         strings_off, identity.encode("ascii"))
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        keys.tofile(f)
+        records.tofile(f)
+        f.write(strings)
+    os.replace(tmp, out_path)
+    return len(keys)
+
+
+class CrcTable:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:      # 빈 파일
+                raise CrcTableError(f"{path}: {e}") from e
+        try:
+            magic, order, n, keys_off, records_off, strings_off, identity = \
+                HEADER.unpack_from(self._mm, 0)
+        except struct.error as e:
+            self._mm.close()
+            raise CrcTableError(f"{path}: {e}") from e
+        if magic != MAGIC or order != sys.byteorder[0].encode():
+            self._mm.close()
+            raise CrcTableError(f"{path}: not a CRC table for this platform")
+        # 쓰다 만 파일: 구역 위치가 N과 맞지 않거나 파일 끝을 넘으면 쓰지 않는다
+        if (records_off - keys_off != n * 4 or strings_off - records_off != n * RECORD.size
+                or strings_off > len(self._mm)):
+            self._mm.close()
+            raise CrcTableError(f"{path}: truncated CRC table")
+        self.identity = identity.rstrip(b"\0").decode("ascii")
+        self._view = memoryview(self._mm)
+        self._keys = self._view[keys_off:records_off].cast("I")
+        self._records_off = records_off
+        self._strings_off = strings_off
+        self.count = n
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _find(self, key, lo=0):
+        i = bisect_left(self._keys, key, lo)
+        return i if i < self.count and self._keys[i] == key else -1
+
+    def _info(self, i):
+        flags, off, length = RECORD.unpack_from(self._mm, self._records_off + i * RECORD.size)
+        start = self._strings_off + off
+        values = self._mm[start:start + length].decode("utf-8").split("\0")
+        info = {field: value or None for field, value in zip(FIELDS, values)}
+        if flags & FLAG_AMBIGUOUS:
+            info["ambiguous"] = True
+        return info
+
+    def lookup(self, crc32):
+        i = self._find(int(crc32, 16))
+        return self._info(i) if i >= 0 else None
+
+    def lookup_many(self, crcs):
+        # OpenVGDB.lookup_many와 같은 {crc: info}. 정렬된 키로 한 번 훑으며 탐색 범위를 좁힌다
+        results = {}
+        lo = 0
+        with METRICS.timer("crctable.lookup_many"):
+            for crc in sorted(set(crcs), key=lambda c: int(c, 16)):
+                key = int(crc, 16)
+                i = bisect_left(self._keys, key, lo)
+                lo = i
+                if i < self.count and self._keys[i] == key:
+                    results[crc] = self._info(i)
+        return results
+
+    def close(self):
+        if self._mm is not None:
+            self._keys.release()
+            self._view.release()
+            self._mm.close()
+            self._mm = None
@@ -0,0 +1,124 @@
+import os, shlex
+
+# ---------------------------
+# 멀티 트랙/멀티 디스크 묶음
+# ---------------------------
+# .m3u(디스크 목록), .cue/.gdi(트랙 목록)를 하나의 게임으로 묶는다.
+# 게임 항목은 목록 파일 하나로 쓰고, 해시는 OpenVGDB가 기준으로 삼는
+# 데이터 트랙 하나만 계산한다. 목록에 포함된 파일은 따로 게임이 되지 않는다.
+SET_EXTS = (".m3u", ".cue", ".gdi")
+
+
+def _read_lines(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def parse_cue(path):
+    # [(파일, 첫 트랙 종류)] 예: [("Game (Track 1).bin", "MODE2/2352"), ...]
+    files = []
+    current = None
+    for line in _read_lines(path):
+        upper = line.upper()
+        if upper.startswith("FILE "):
+            rest = line[5:].strip()
+            if rest.startswith('"'):
+                name, quote, _ = rest[1:].partition('"')
+                if not quote:
+                    # 닫는 따옴표가 없는 줄은 건너뛴다 (다음 TRACK이 엉뚱한 파일에 붙지 않게)
+                    current = None
+                    continue
+            else:
+                name = rest.rsplit(" ", 1)[0]
+            current = [name, None]
+            files.append(current)
+        elif upper.startswith("TRACK ") and current is not None and current[1] is None:
+            parts = line.split()
+            current[1] = parts[2].upper() if len(parts) > 2 else ""
+    return [(name, kind or "") for name, kind in files]
+
+
+def parse_gdi(path):
+    # [(파일, 데이터 트랙 여부)]. 트랙 종류 4가 데이터, 0이 오디오
+    tracks = []
+    for line in _read_lines(path)[1:]:
+        try:
+            parts = shlex.split(line, posix=True)
+        except ValueError:
+            parts = line.split()
+        if len(parts) >= 5:
+            tracks.append((parts[4], parts[2] == "4"))
+    return tracks
+
+
+def parse_m3u(path):
+    return [line for line in _read_lines(path) if not line.startswith("#")]
+
+
+def _resolve(base_dir, folder, name):
+    # 목록 파일 기준 상대 경로 -> ROM 폴더 기준 상대 경로
+    full = os.path.normpath(os.path.join(base_dir, name))
+    return os.path.relpath(full, folder)
+
+
+def _track_set(folder, rel):
+    # (데이터 트랙, 구성 파일들) - 구성 파일은 ROM 폴더 기준 상대 경로
+    path = os.path.join(folder, rel)
+    base_dir = os.path.dirname(path)
+    lower = rel.lower()
+    if lower.endswith(".cue"):
+        files = [(_resolve(base_dir, folder, name), kind) for name, kind in parse_cue(path)]
+        members = [name for name, _ in files]
+        data = next((name for name, kind in files if kind != "AUDIO"), members[0] if members else None)
+        return data, members
+    if lower.endswith(".gdi"):
+        tracks = [(_resolve(base_dir, folder, name), is_data) for name, is_data in parse_gdi(path)]
+        members = [name for name, _ in tracks]
+        data_tracks = [name for name, is_data in tracks if is_data] or members
+
+        def size(name):
+            try:
+                return os.path.getsize(os.path.join(folder, name))
+            except OSError:
+                return -1
+        data = max(data_tracks, key=size) if data_tracks else None
+        return data, members
+    return rel, []
+
+
+def group_disc_sets(folder, names):
+    # targets: {게임 파일: 해시할 파일}, parents: {구성 파일: 게임 파일}
+    targets = {}
+    parents = {}
+    lists = [n for n in names if n.lower().endswith(SET_EXTS)]
+    # m3u를 먼저 처리해서 m3u에 포함된 cue/gdi는 따로 게임이 되지 않게 한다
+    lists.sort(key=lambda n: (not n.lower().endswith(".m3u"), n))
+    for name in lists:
+        if name in parents:
+            continue
+        path = os.path.join(folder, name)
+        try:
+            if name.lower().endswith(".m3u"):
+                discs = [_resolve(folder, folder, d) for d in parse_m3u(path)]
+                members = list(discs)
+                data = None
+                for disc in discs:
+                    disc_data, disc_members = _track_set(folder, disc)
+                    members.extend(disc_members)
+                    if data is None:
+                        data = disc_data
+            else:
+                data, members = _track_set(folder, name)
+        except (OSError, ValueError):
+            # 읽을 수 없거나 깨진 목록 파일은 묶지 않고 낱개 파일로 둔다
+            continue
+        if data is None:
+            continue
+        targets[name] = data
+        for member in members:
+            if member != name:
+                parents.setdefault(member, name)
+    # 다른 목록에 포함된 목록 파일은 게임에서 뺀다
+    for member in parents:
+        targets.pop(member, None)
+    return targets, parents
@@ -1,164 +1,253 @@
-import sys, os, re, sqlite3, json, zlib, zipfile
-import py7zr
+import sys, os, atexit, time, threading, traceback
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal, QAbstractListModel, QModelIndex
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout,
-    QFileDialog, QMessageBox, QComboBox, QListWidget, QLineEdit, QTextEdit
+    QFileDialog, QMessageBox, QComboBox, QListWidget, QListView, QLineEdit, QTextEdit,
+    QProgressBar
 )
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from app.cores import get_registry
+from app.metadata import is_unmapped
+from app.metrics import METRICS, format_summary
+# DB/해시/압축 관련 모듈은 첫 창을 띄운 뒤 처음 쓰는 곳에서 불러온다 (기동 시간)
+
 OPENVGDB_PATH = r"C:\PegasusTool\data\openvgdb.sqlite"
 APPJS_PATH = r"C:\PegasusTool\data\app.js"
+CRC_TABLE_PATH = r"C:\PegasusTool\data\openvgdb.crc"
 CRC_CACHE = "crc_cache.json"
+HASH_DB = "crc_cache.sqlite"
+QUERY_CACHE = "openvgdb_cache.json"
+SCAN_WORKERS = os.cpu_count()
 
 # ---------------------------
-# app.js 파싱
+# 캐시
 # ---------------------------
-def load_cores_from_appjs():
-    if not os.path.exists(APPJS_PATH):
-        return []
-    with open(APPJS_PATH, "r", encoding="utf-8") as f:
-        content = f.read()
-    matches = re.findall(r"\{[^}]+\}", content)
-    cores = []
-    for m in matches:
-        fullname = re.search(r'fullname\s*:\s*"([^"]+)"', m)
-        sysname = re.search(r'sysname\s*:\s*"([^"]+)"', m)
-        exts = re.search(r'exts\s*:\s*"([^"]+)"', m)
-        abbr = re.search(r'abbr\s*:\s*"([^"]+)"', m)
-        core = re.search(r'core\s*:\s*"([^"]+)"', m)
-        if fullname and core:
-            cores.append({
-                "fullname": fullname.group(1),
-                "sysname": sysname.group(1) if sysname else "",
-                "exts": [e.strip() for e in exts.group(1).split(",")] if exts else [],
-                "abbr": abbr.group(1) if abbr else "",
-                "core": core.group(1)
-            })
-    return cores
-
-CORES = load_cores_from_appjs()
+_hash_store = None
+
+def get_hash_store():
+    global _hash_store
+    if _hash_store is None:
+        from app.hashstore import HashStore
+        _hash_store = HashStore(HASH_DB)
+        if os.path.exists(CRC_CACHE):
+            _hash_store.migrate_json(CRC_CACHE)
+        atexit.register(_hash_store.close)
+    return _hash_store
 
 # ---------------------------
-# 캐시
+# OpenVGDB 조회
 # ---------------------------
-def load_cache():
-    if os.path.exists(CRC_CACHE):
-        with open(CRC_CACHE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
+_openvgdb = None
+
+def get_openvgdb():
+    global _openvgdb
+    if _openvgdb is None:
+        from app.openvgdb import OpenVGDB
+        _openvgdb = OpenVGDB(OPENVGDB_PATH, QUERY_CACHE, CRC_TABLE_PATH)
+        atexit.register(_openvgdb.close)
+    return _openvgdb
+
+_title_indexes = {}
+
+def get_title_index(system=None):
+    # 자동 후보용 제목 색인. 시스템별로 한 번만 만든다
+    index = _title_indexes.get(system)
+    if index is None:
+        from app.matcher import TitleIndex
+        index = TitleIndex(get_openvgdb().titles(system))
+        if system and not len(index):
+            # OpenVGDB 시스템 이름이 app.js sysname과 다르면 전체 제목에서 찾는다
+            index = get_title_index(None)
+        _title_indexes[system] = index
+    return index
 
-def save_cache(cache):
-    with open(CRC_CACHE, "w", encoding="utf-8") as f:
-        json.dump(cache, f, indent=2)
+def lookup_openvgdb(crc32):
+    return get_openvgdb().lookup(crc32)
+
+def lookup_openvgdb_batch(crcs):
+    return get_openvgdb().lookup_many(crcs)
 
 # ---------------------------
-# CRC 계산
+# 백그라운드 스캔 작업
 # ---------------------------
-def compute_crc(file_path, allowed_exts):
-    cache = load_cache()
-    mtime = os.path.getmtime(file_path)
-    results = {}
-
-    if file_path.lower().endswith(".zip"):
-        with zipfile.ZipFile(file_path, "r") as z:
-            valid_entries = [info for info in z.infolist()
-                             if os.path.splitext(info.filename)[1].lower().strip(".") in allowed_exts]
-            if not valid_entries:
-                return {}
-            info = max(valid_entries, key=lambda e: e.file_size)
-            key = f"{file_path}:{info.filename}:{mtime}"
-            if key in cache:
-                results[info.filename] = cache[key]
-            else:
-                crc = "%08X" % info.CRC
-                cache[key] = crc
-                results[info.filename] = crc
-
-    elif file_path.lower().endswith(".7z"):
-        with py7zr.SevenZipFile(file_path, "r") as archive:
-            valid_entries = [name for name, entry in archive.list().items()
-                             if os.path.splitext(name)[1].lower().strip(".") in allowed_exts]
-            if not valid_entries:
-                return {}
-            name = valid_entries[0]
-            key = f"{file_path}:{name}:{mtime}"
-            if key in cache:
-                results[name] = cache[key]
-            else:
-                entry = archive.list()[name]
-                if entry.crc is not None:
-                    crc = "%08X" % entry.crc
-                else:
-                    with archive.read([name])[name] as f:
-                        prev = 0
-                        for chunk in iter(lambda: f.read(4096), b""):
-                            prev = zlib.crc32(chunk, prev)
-                        crc = "%08X" % (prev & 0xFFFFFFFF)
-                cache[key] = crc
-                results[name] = crc
-    else:
-        ext = os.path.splitext(file_path)[1].lower().strip(".")
-        if ext not in allowed_exts:
-            return {}
-        key = f"{file_path}:{mtime}"
-        if key in cache:
-            return {os.path.basename(file_path): cache[key]}
-        prev = 0
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                prev = zlib.crc32(chunk, prev)
-        crc = "%08X" % (prev & 0xFFFFFFFF)
-        cache[key] = crc
-        results[os.path.basename(file_path)] = crc
-
-    save_cache(cache)
-    return results
+class ScanJob(QThread):
+    progress = pyqtSignal(int, int, float, float, float)  # done, total, files/s, bytes/s, eta
+    results = pyqtSignal(list)                             # [(rom, name), ...]
+    finished_scan = pyqtSignal(bool)                       # 취소 없이 끝났는지
+    failed = pyqtSignal(str)                               # 예외로 끝났을 때 메시지
+
+    EMIT_INTERVAL = 0.1
+
+    def __init__(self, rom_folder, chosen, out_file, append):
+        super().__init__()
+        self.rom_folder = rom_folder
+        self.chosen = chosen
+        self.out_file = out_file
+        self.append = append
+        self._cancel = threading.Event()
+        self._buffer = []
+        self._last_emit = 0.0
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _on_progress(self, p):
+        now = time.monotonic()
+        if now - self._last_emit < self.EMIT_INTERVAL and p.done < p.total:
+            return
+        self._last_emit = now
+        self.progress.emit(p.done, p.total, p.files_per_sec, p.bytes_per_sec, p.eta)
+        if self._buffer:
+            self.results.emit(self._buffer)
+            self._buffer = []
+
+    def _on_result(self, rom, name):
+        self._buffer.append((rom, name))
+
+    def run(self):
+        # 스레드 밖으로 예외가 나가면 PyQt가 프로세스를 끝내므로 여기서 받아 알린다
+        # (DB 없음, 네트워크 폴더 끊김, 인코딩이 깨진 metadata 등)
+        try:
+            from app.generate import write_metadata
+            ok = write_metadata(self.rom_folder, self.chosen, self.out_file, get_hash_store(),
+                                lookup_openvgdb_batch, append=self.append, workers=SCAN_WORKERS,
+                                cancel=self._cancel, on_progress=self._on_progress,
+                                on_result=self._on_result, lookup_hashes=get_openvgdb().lookup_hashes)
+        except Exception as e:
+            traceback.print_exc()
+            self.failed.emit(f"{type(e).__name__}: {e}")
+            return
+        if self._buffer:
+            self.results.emit(self._buffer)
+            self._buffer = []
+        self.finished_scan.emit(ok)
 
 # ---------------------------
-# OpenVGDB 조회
+# 리스트 모델
 # ---------------------------
-def lookup_openvgdb(crc32):
-    db = sqlite3.connect(OPENVGDB_PATH)
-    cursor = db.cursor()
-    cursor.execute("""
-        SELECT rl.releaseTitleName, rl.releaseGenre, rl.releaseDeveloper, rl.releaseDescription, rl.TEMPsystemName
-        FROM ROMs r
-        JOIN RELEASES rl ON r.romID = rl.romID
-        WHERE r.romHashCRC = ?
-    """, (crc32,))
-    row = cursor.fetchone()
-    db.close()
-    if row:
-        return {
-            "name": row[0],
-            "genre": row[1],
-            "developer": row[2],
-            "description": row[3],
-            "system": row[4]
-        }
-    return None
+# 항목 객체를 만들지 않고 파이썬 객체 목록을 그대로 보여준다.
+# 뷰에는 FETCH_SIZE개씩만 알리고(canFetchMore/fetchMore), 필터는 소문자 키 목록에서
+# 바로 거른다. QSortFilterProxyModel은 행마다 data()를 파이썬으로 호출하고
+# 아직 가져오지 않은 행은 거르지 못하므로 필터도 모델 안에서 처리한다.
+class RowListModel(QAbstractListModel):
+    FETCH_SIZE = 500
+
+    def __init__(self, text, rows=(), parent=None):
+        super().__init__(parent)
+        self.text = text
+        self.set_rows(rows)
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = list(rows)
+        self.keys = None                      # 필터를 처음 쓸 때 만든다
+        self.visible = range(len(self.rows))
+        self.fetched = min(self.FETCH_SIZE, len(self.visible))
+        self.endResetModel()
+
+    def set_filter(self, text):
+        needle = text.strip().lower()
+        if needle and self.keys is None:
+            self.keys = [self.text(r).lower() for r in self.rows]
+        self.beginResetModel()
+        if needle:
+            self.visible = [i for i, key in enumerate(self.keys) if needle in key]
+        else:
+            self.visible = range(len(self.rows))
+        self.fetched = min(self.FETCH_SIZE, len(self.visible))
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.fetched
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.fetched < len(self.visible)
+
+    def fetchMore(self, parent):
+        count = min(self.FETCH_SIZE, len(self.visible) - self.fetched)
+        if parent.isValid() or count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.fetched, self.fetched + count - 1)
+        self.fetched += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        row = self.row_at(index)
+        if row is None:
+            return None
+        if role == Qt.DisplayRole:
+            return self.text(row)
+        if role == Qt.UserRole:
+            return row
+        return None
+
+    def row_at(self, index):
+        if not index.isValid() or index.row() >= self.fetched:
+            return None
+        return self.rows[self.visible[index.row()]]
+
+    def refresh(self, index):
+        # 행 객체가 바뀐 뒤 표시/필터 키 갱신
+        if self.row_at(index) is None:
+            return
+        i = self.visible[index.row()]
+        if self.keys is not None:
+            self.keys[i] = self.text(self.rows[i]).lower()
+        self.dataChanged.emit(index, index)
+
+
+def make_list_view(model):
+    view = QListView()
+    view.setUniformItemSizes(True)
+    view.setModel(model)
+    return view
 
 # ---------------------------
 # 수동 매핑 창
 # ---------------------------
 class ManualMappingWindow(QWidget):
-    def __init__(self, metadata_file):
+    def __init__(self, document, system=None):
         super().__init__()
         self.setWindowTitle("수동 매핑")
         self.setGeometry(300, 200, 800, 500)
-        self.metadata_file = metadata_file
+        self.document = document
+        self.system = system
+        self.candidates = {}                 # {rom: [(점수, row)]}
 
         layout = QHBoxLayout()
-        self.unmapped_list = QListWidget()
-        layout.addWidget(self.unmapped_list)
+        left_layout = QVBoxLayout()
+        self.unmapped_filter = QLineEdit()
+        self.unmapped_filter.setPlaceholderText("파일 이름 필터")
+        self.unmapped_model = RowListModel(self.unmapped_text, parent=self)
+        self.unmapped_list = make_list_view(self.unmapped_model)
+        self.unmapped_list.selectionModel().currentChanged.connect(self.show_candidates)
+        self.unmapped_filter.textChanged.connect(self.unmapped_model.set_filter)
+        self.auto_btn = QPushButton("자동 후보 찾기")
+        self.auto_btn.clicked.connect(self.find_candidates)
+        self.accept_btn = QPushButton("1순위 확정 → 다음")
+        self.accept_btn.clicked.connect(self.accept_top)
+        left_layout.addWidget(self.unmapped_filter)
+        left_layout.addWidget(self.unmapped_list)
+        left_layout.addWidget(self.auto_btn)
+        left_layout.addWidget(self.accept_btn)
+        layout.addLayout(left_layout)
 
         right_layout = QVBoxLayout()
         self.search_box = QLineEdit()
         self.search_btn = QPushButton("검색")
         self.search_btn.clicked.connect(self.do_search)
+        # 입력할 때마다 검색 (FTS5라 빠르므로 짧게 디바운스만)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.do_search)
+        self.search_box.textChanged.connect(self.search_timer.start)
         right_layout.addWidget(self.search_box)
         right_layout.addWidget(self.search_btn)
 
-        self.result_list = QListWidget()
+        self.result_model = RowListModel(lambda r: f"{r[0]} | {r[3]} | {r[1]}", parent=self)
+        self.result_list = make_list_view(self.result_model)
         right_layout.addWidget(self.result_list)
 
         self.select_btn = QPushButton("선택 → 매핑")
@@ -170,76 +259,112 @@ class ManualMappingWindow(QWidget):
 
         self.load_unmapped()
 
+    def set_document(self, document):
+        # 생성/업데이트가 파일을 다시 쓴 뒤 새 문서로 바꾼다
+        self.document = document
+        self.candidates = {}
+        self.result_model.set_rows([])
+        self.load_unmapped()
+        self.unmapped_model.set_filter(self.unmapped_filter.text())
+
+    def set_busy(self, busy):
+        # 작업 중에는 저장하지 않는다 (작업이 쓴 내용을 덮어쓰거나 작업에 덮어써지므로)
+        for btn in (self.accept_btn, self.select_btn):
+            btn.setEnabled(not busy)
+
     def load_unmapped(self):
-        with open(self.metadata_file, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-        current_game = None
-        for line in lines:
-            if line.startswith("game:") and len(line.strip().split(":",1)[1])==0:
-                current_game = line
-            if line.startswith("file:") and current_game:
-                rom = line.split(":",1)[1].strip()
-                self.unmapped_list.addItem(rom)
+        # 제목이 비었거나 파일 이름 그대로인(OpenVGDB에서 못 찾은) game 블록의 파일만
+        self.unmapped_model.set_rows(
+            (rom, game) for game in self.document.games if is_unmapped(game) for rom in game.files)
+
+    def unmapped_text(self, r):
+        rom, game = r
+        if not is_unmapped(game):
+            return rom + " (매핑완료)"
+        found = self.candidates.get(rom)
+        if found:
+            score, row = found[0]
+            return f"{rom}  →  {row[0]} ({score:.2f})"
+        return rom
+
+    def find_candidates(self):
+        # 미매핑 ROM 전체의 상위 후보를 한 번에 계산
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            from app.matcher import rank_candidates
+            index = get_title_index(self.system)
+            roms = [rom for rom, game in self.unmapped_model.rows if is_unmapped(game)]
+            self.candidates = rank_candidates(roms, index)
+        finally:
+            QApplication.restoreOverrideCursor()
+        self.unmapped_model.set_rows(self.unmapped_model.rows)
+        self.unmapped_model.set_filter(self.unmapped_filter.text())
+
+    def show_candidates(self, index, previous=None):
+        unmapped = self.unmapped_model.row_at(index)
+        if unmapped is None or unmapped[0] not in self.candidates:
+            return
+        self.result_model.set_rows(row for _, row in self.candidates[unmapped[0]])
+        self.result_list.setCurrentIndex(self.result_model.index(0))
+
+    def accept_top(self):
+        rom_index = self.unmapped_list.currentIndex()
+        unmapped = self.unmapped_model.row_at(rom_index)
+        if unmapped is None or not self.candidates.get(unmapped[0]):
+            return
+        self.map_game(rom_index, self.candidates[unmapped[0]][0][1])
+        next_index = self.unmapped_model.index(rom_index.row() + 1)
+        if next_index.isValid():
+            self.unmapped_list.setCurrentIndex(next_index)
 
     def do_search(self):
-        self.result_list.clear()
         kw = self.search_box.text().strip()
-        if not kw:
-            return
-        results = search_openvgdb(kw)
-        for r in results:
-            self.result_list.addItem(f"{r[0]} | {r[3]} | {r[1]}")
+        self.result_model.set_rows(search_openvgdb(kw, self.system) if kw else [])
 
     def do_map(self):
-        rom_item = self.unmapped_list.currentItem()
-        sel_item = self.result_list.currentItem()
-        if not rom_item or not sel_item:
+        selected = self.result_model.row_at(self.result_list.currentIndex())
+        if selected is not None:
+            self.map_game(self.unmapped_list.currentIndex(), selected)
+
+    def map_game(self, rom_index, selected):
+        unmapped = self.unmapped_model.row_at(rom_index)
+        if unmapped is None or not self.select_btn.isEnabled():
             return
-        rom = rom_item.text()
-        game, sysname, genre = sel_item.text().split(" | ")
-        lines = []
-        with open(self.metadata_file,"r",encoding="utf-8") as f:
-            lines=f.readlines()
-        new_lines=[]
-        for line in lines:
-            if line.startswith("file:") and rom in line:
-                new_lines.append(f"game: {game}\n")
-                new_lines.append(line)
-                new_lines.append(f"developer: \n")
-                new_lines.append(f"description: {genre}\n\n")
-            else:
-                new_lines.append(line)
-        with open(self.metadata_file,"w",encoding="utf-8") as f:
-            f.writelines(new_lines)
-        rom_item.setText(rom + " (매핑완료)")
-
-def search_openvgdb(keyword):
-    db = sqlite3.connect(OPENVGDB_PATH)
-    cursor = db.cursor()
-    cursor.execute("""
-        SELECT rl.releaseTitleName, rl.releaseGenre, rl.releaseDeveloper, rl.TEMPsystemName
-        FROM RELEASES rl
-        WHERE rl.releaseTitleName LIKE ?
-        LIMIT 20
-    """, (f"%{keyword}%",))
-    results = cursor.fetchall()
-    db.close()
-    return results
+        game = unmapped[1]
+        title, genre, developer, sysname = selected
+        self.document.set_field(game, "game", title)
+        self.document.set_field(game, "developer", developer or "")
+        self.document.set_field(game, "genre", genre or "")
+        self.document.save()
+        self.unmapped_model.refresh(rom_index)
+
+def search_openvgdb(keyword, system=None):
+    # 컬렉션 시스템 안에서 먼저 찾고, 없으면(OpenVGDB 시스템 이름이 다를 때 등) 전체에서
+    rows = get_openvgdb().search(keyword, system) if system else []
+    return rows or get_openvgdb().search(keyword)
 
 # ---------------------------
 # 데이터 편집 창
 # ---------------------------
 class DataEditWindow(QWidget):
-    def __init__(self, metadata_file):
+    def __init__(self, document):
         super().__init__()
         self.setWindowTitle("데이터 편집")
         self.setGeometry(350, 200, 900, 500)
-        self.metadata_file = metadata_file
+        self.document = document
+        self.current = None
 
         layout = QHBoxLayout()
-        self.game_list = QListWidget()
-        layout.addWidget(self.game_list)
-        self.game_list.itemClicked.connect(self.load_details)
+        left_layout = QVBoxLayout()
+        self.game_filter = QLineEdit()
+        self.game_filter.setPlaceholderText("제목 필터")
+        self.game_model = RowListModel(lambda game: game.title, parent=self)
+        self.game_list = make_list_view(self.game_model)
+        self.game_filter.textChanged.connect(self.game_model.set_filter)
+        self.game_list.clicked.connect(self.load_details)
+        left_layout.addWidget(self.game_filter)
+        left_layout.addWidget(self.game_list)
+        layout.addLayout(left_layout)
 
         self.fields = {}
         right_layout = QVBoxLayout()
@@ -258,56 +383,39 @@ class DataEditWindow(QWidget):
 
         self.load_games()
 
+    def set_document(self, document):
+        self.document = document
+        self.current = None
+        for edit in self.fields.values():
+            edit.clear()
+        self.load_games()
+        self.game_model.set_filter(self.game_filter.text())
+
+    def set_busy(self, busy):
+        self.save_btn.setEnabled(not busy)
+
     def load_games(self):
-        with open(self.metadata_file,"r",encoding="utf-8") as f:
-            lines=f.readlines()
-        for line in lines:
-            if line.startswith("game:"):
-                name=line.split(":",1)[1].strip()
-                self.game_list.addItem(name)
-
-    def load_details(self,item):
-        gname=item.text()
-        with open(self.metadata_file,"r",encoding="utf-8") as f:
-            lines=f.readlines()
-        block=[]
-        capture=False
-        for line in lines:
-            if line.startswith("game:"):
-                capture=(gname in line)
-                block=[]
-            if capture:
-                block.append(line)
+        self.game_model.set_rows(self.document.games)
+
+    def load_details(self, index):
+        self.current = self.game_model.row_at(index)
+        if self.current is None:
+            return
         for field in self.fields:
-            self.fields[field].setText("")
-        for l in block:
-            for field in self.fields:
-                if l.startswith(field+":"):
-                    self.fields[field].setText(l.split(":",1)[1].strip())
+            self.fields[field].setText(self.current.get(field))
 
     def save_data(self):
-        gname=self.fields["game"].text()
-        lines=[]
-        with open(self.metadata_file,"r",encoding="utf-8") as f:
-            lines=f.readlines()
-        new_lines=[]
-        capture=False
-        for line in lines:
-            if line.startswith("game:"):
-                capture=(gname in line)
-            if capture:
-                replaced=False
-                for field,val in self.fields.items():
-                    if line.startswith(field+":"):
-                        new_lines.append(f"{field}: {val.text()}\n")
-                        replaced=True
-                        break
-                if not replaced:
-                    new_lines.append(line)
-            else:
-                new_lines.append(line)
-        with open(self.metadata_file,"w",encoding="utf-8") as f:
-            f.writelines(new_lines)
+        game = self.current
+        if game is None or not self.save_btn.isEnabled():
+            return
+        for field, edit in self.fields.items():
+            value = edit.text()
+            if value != game.get(field):
+                self.document.set_field(game, field, value)
+        self.document.save()
+        index = self.game_list.currentIndex()
+        if self.game_model.row_at(index) is game:
+            self.game_model.refresh(index)
         QMessageBox.information(self,"저장","메타데이터가 갱신되었습니다.")
 
 # ---------------------------
@@ -320,6 +428,16 @@ class PegasusTool(QWidget):
         self.setGeometry(200, 200, 600, 500)
 
         layout = QVBoxLayout()
+        self.core_combo = QComboBox()
+        layout.addWidget(QLabel("코어 선택"))
+        layout.addWidget(self.core_combo)
+
+        self.rom_label = QLabel("선택된 ROM 폴더: 없음")
+        layout.addWidget(self.rom_label)
+        btn_folder = QPushButton("ROM 폴더 선택")
+        btn_folder.clicked.connect(self.select_folder)
+        layout.addWidget(btn_folder)
+
         btn_row1 = QHBoxLayout()
         self.btn_generate = QPushButton("메타데이터 생성")
         self.btn_generate.clicked.connect(self.generate_metadata)
@@ -339,25 +457,177 @@ class PegasusTool(QWidget):
         layout.addLayout(btn_row1)
         layout.addLayout(btn_row2)
 
+        self.progress_bar = QProgressBar()
+        self.status_label = QLabel("")
+        self.btn_cancel = QPushButton("취소")
+        self.btn_cancel.setEnabled(False)
+        self.btn_cancel.clicked.connect(self.cancel_job)
+        self.result_list = QListWidget()
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.btn_cancel)
+        layout.addWidget(self.result_list)
+
         self.rom_folder=None
+        self.cores_for_system = []
+        self.job = None
+        self.document = None
+        self.mmw = self.dew = None
         self.setLayout(layout)
 
+    def select_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "ROM 폴더 선택")
+        if folder:
+            self.rom_folder = folder
+            self.document = None
+            self.rom_label.setText(f"선택된 ROM 폴더: {folder}")
+            key = os.path.basename(folder).lower()
+
+            # 기종 후보 찾기
+            candidates = get_registry(APPJS_PATH).for_abbr(key)
+            if candidates:
+                self.cores_for_system = candidates
+                self.core_combo.clear()
+                for c in candidates:
+                    self.core_combo.addItem(c["fullname"])
+            else:
+                QMessageBox.warning(self, "경고", f"해당 폴더명({key})에 맞는 기종을 찾을 수 없습니다.")
+
+    def write_metadata(self, out_file, append=False):
+        if not self.cores_for_system:
+            return False
+        chosen_name = self.core_combo.currentText()
+        chosen = next((c for c in self.cores_for_system if c["fullname"] == chosen_name), None)
+        if not chosen:
+            return False
+        if self.job is not None and self.job.isRunning():
+            return False
+
+        self.result_list.clear()
+        self.progress_bar.setValue(0)
+        self.btn_generate.setEnabled(False)
+        self.btn_update.setEnabled(False)
+        self.btn_cancel.setEnabled(True)
+        for window in self.edit_windows():
+            window.set_busy(True)
+        METRICS.reset()
+        self.job = ScanJob(self.rom_folder, chosen, out_file, append)
+        self.job.progress.connect(self.on_job_progress)
+        self.job.results.connect(self.on_job_results)
+        self.job.finished_scan.connect(self.on_job_finished)
+        self.job.failed.connect(self.on_job_failed)
+        self.job.start()
+        return True
+
+    def cancel_job(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.btn_cancel.setEnabled(False)
+
+    def closeEvent(self, event):
+        if self.job is not None and self.job.isRunning():
+            self.job.cancel()
+            self.job.wait()
+        super().closeEvent(event)
+
+    def on_job_progress(self, done, total, files_per_sec, bytes_per_sec, eta):
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(done)
+        self.status_label.setText(
+            f"{done}/{total}  {files_per_sec:.1f} files/s  "
+            f"{bytes_per_sec / (1024 * 1024):.1f} MB/s  남은 시간 {eta:.0f}초")
+
+    def on_job_results(self, items):
+        self.result_list.addItems([f"{name}  ←  {rom}" for rom, name in items])
+
+    def job_running(self):
+        return self.job is not None and self.job.isRunning()
+
+    def edit_windows(self):
+        return [w for w in (self.mmw, self.dew) if w is not None and w.isVisible()]
+
+    def reload_edit_windows(self, meta_file):
+        # 열린 편집 창은 작업 전 문서를 들고 있으므로 새로 쓴 파일을 다시 읽어 넘긴다
+        document = None
+        windows = self.edit_windows()
+        if windows and os.path.exists(meta_file):
+            from app.metadata import MetadataDocument
+            try:
+                document = MetadataDocument.load(meta_file)
+            except (OSError, ValueError):
+                document = None
+        for window in windows:
+            if document is None:
+                window.close()
+            else:
+                window.set_document(document)
+                window.set_busy(False)
+        self.document = document
+
+    def _job_done(self):
+        self.reload_edit_windows(self.job.out_file)
+        self.btn_generate.setEnabled(True)
+        self.btn_update.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
+
+    def on_job_failed(self, message):
+        self._job_done()
+        self.status_label.setText("오류로 중단됨")
+        QMessageBox.critical(self, "오류", f"작업 중 오류가 발생했습니다.\n{message}")
+
+    def on_job_finished(self, ok):
+        self._job_done()
+        # 어느 단계가 느렸는지 콘솔에 남기고 상태줄에는 캐시 적중률만
+        snapshot = METRICS.snapshot()
+        print(format_summary(snapshot))
+        ratio = snapshot["counters"].get("hash.cache_hit_ratio")
+        if ratio is not None:
+            self.status_label.setText(self.status_label.text() + f"  캐시 적중 {ratio * 100:.0f}%")
+        if not ok:
+            QMessageBox.information(self, "취소", "작업이 취소되었습니다.")
+        elif self.job.append:
+            QMessageBox.information(self, "완료", "신규 ROM만 추가되었습니다.")
+        else:
+            QMessageBox.information(self, "완료", "metadata.pegasus.txt 생성 완료")
+
     def generate_metadata(self):
-        QMessageBox.information(self,"생성","(Stub) 메타데이터 생성 실행")
+        if not self.rom_folder:
+            QMessageBox.warning(self, "오류", "ROM 폴더를 선택하세요.")
+            return
+        out_file = os.path.join(self.rom_folder, "metadata.pegasus.txt")
+        self.write_metadata(out_file, append=False)
 
     def update_metadata(self):
-        QMessageBox.information(self,"업데이트","(Stub) 업데이트 실행")
+        if not self.rom_folder:
+            return
+        out_file = os.path.join(self.rom_folder, "metadata.pegasus.txt")
+        if not os.path.exists(out_file):
+            QMessageBox.warning(self, "오류", "기존 metadata가 없습니다.")
+            return
+        self.write_metadata(out_file, append=True)
+
+    def load_document(self):
+        # 두 편집 창이 같은 문서 객체를 공유한다
+        if self.document is None:
+            meta_file = os.path.join(self.rom_folder,"metadata.pegasus.txt")
+            if not os.path.exists(meta_file):
+                QMessageBox.warning(self,"오류","metadata.pegasus.txt가 없습니다.")
+                return None
+            from app.metadata import MetadataDocument
+            self.document = MetadataDocument.load(meta_file)
+        return self.document
 
     def open_manual_mapping(self):
         if not self.rom_folder:
             self.rom_folder = QFileDialog.getExistingDirectory(self,"ROM 폴더 선택")
         if not self.rom_folder:
             return
-        meta_file = os.path.join(self.rom_folder,"metadata.pegasus.txt")
-        if not os.path.exists(meta_file):
-            QMessageBox.warning(self,"오류","metadata.pegasus.txt가 없습니다.")
+        document = self.load_document()
+        if document is None:
             return
-        self.mmw = ManualMappingWindow(meta_file)
+        system = document.collections[0].title if document.collections else None
+        self.mmw = ManualMappingWindow(document, system)
+        self.mmw.set_busy(self.job_running())
         self.mmw.show()
 
     def open_data_edit(self):
@@ -365,11 +635,11 @@ class PegasusTool(QWidget):
             self.rom_folder = QFileDialog.getExistingDirectory(self,"ROM 폴더 선택")
         if not self.rom_folder:
             return
-        meta_file = os.path.join(self.rom_folder,"metadata.pegasus.txt")
-        if not os.path.exists(meta_file):
-            QMessageBox.warning(self,"오류","metadata.pegasus.txt가 없습니다.")
+        document = self.load_document()
+        if document is None:
             return
-        self.dew = DataEditWindow(meta_file)
+        self.dew = DataEditWindow(document)
+        self.dew.set_busy(self.job_running())
         self.dew.show()
 
 if __name__=="__main__":
@@ -0,0 +1,196 @@
+import os, time
+from app.discsets import group_disc_sets
+from app.manifest import ScanManifest, stat_folder
+from app.metadata import MetadataDocument, MetadataWriter, Record, fallback_title, make_game
+from app.metrics import METRICS, log_event
+from app.scanner import scan
+
+# ---------------------------
+# 진행 상황
+# ---------------------------
+class ScanProgress:
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+
+    def add(self, nbytes):
+        self.done += 1
+        self.bytes += nbytes
+
+    @property
+    def elapsed(self):
+        return max(time.monotonic() - self.started, 1e-9)
+
+    @property
+    def files_per_sec(self):
+        return self.done / self.elapsed
+
+    @property
+    def bytes_per_sec(self):
+        return self.bytes / self.elapsed
+
+    @property
+    def eta(self):
+        rate = self.files_per_sec
+        if not self.done or not rate:
+            return 0.0
+        return (self.total - self.done) / rate
+
+# ---------------------------
+# metadata.pegasus.txt 생성
+# ---------------------------
+LAUNCH = """am start -n com.retroarch/.browser.retroactivity.RetroActivityFuture
+-e ROM {{file.path}}
+-e LIBRETRO /data/data/com.retroarch/cores/{core}
+-e CONFIGFILE /storage/emulated/0/Android/data/com.retroarch/files/retroarch.cfg
+-e QUITFOCUS
+--activity-clear-task
+--activity-clear-top
+--activity-no-history"""
+
+def collection_record(chosen):
+    record = Record("collection", chosen["sysname"])
+    record.entries.append(["shortname", chosen["abbr"]])
+    record.entries.append(["extensions", ",".join(chosen["exts"])])
+    record.entries.append(["launch", LAUNCH.format(core=chosen["core"])])
+    return record
+
+def _apply_info(doc, game, info):
+    doc.set_field(game, "game", info["name"])
+    doc.set_field(game, "developer", info["developer"] or "")
+    doc.set_field(game, "description", info["description"] or "")
+
+def _update_document(doc, manifest, current):
+    # 처리할 ROM 목록을 돌려주고, 사라진 파일의 game 블록은 문서에서 지운다
+    added, changed, removed = manifest.diff(current)
+    roms = []
+    for name in added:
+        if name in doc.by_file:
+            # 매니페스트 없이 만들어진 기존 항목은 해시하지 않고 기록만
+            manifest.files[name] = current[name]
+        else:
+            roms.append(name)
+    roms.extend(changed)
+
+    gone = set(removed)
+    gone.update(name for name in doc.by_file
+                if name not in current and "/" not in name and "\\" not in name)
+    for name in gone:
+        manifest.files.pop(name, None)
+        game = doc.find_by_file(name)
+        if game is not None and not any(f in current for f in game.files):
+            doc.remove(game)
+    roms.sort()
+    return roms, bool(gone)
+
+def write_metadata(rom_folder, chosen, out_file, store, lookup_batch, append=False,
+                   workers=None, cancel=None, on_progress=None, on_result=None,
+                   lookup_hashes=None, executor=None, io_gate=None):
+    # on_progress(ScanProgress)는 ROM 하나가 해시될 때마다,
+    # on_result(rom, name)은 게임 항목이 기록될 때마다 호출된다.
+    # append=True면 매니페스트와 비교해 추가/변경/삭제된 ROM만 반영한다.
+    # 취소되면 False, 끝까지 돌면 True를 돌려준다. 새로 만들다 취소되면 파일은 바뀌지 않는다.
+    started = time.perf_counter()
+    current = stat_folder(rom_folder, skip={os.path.basename(out_file)})
+    manifest = ScanManifest.load(rom_folder)
+    doc = writer = None
+    rewrite = False
+    new_games = []
+
+    if append and os.path.exists(out_file):
+        doc = MetadataDocument.load(out_file)
+        roms, rewrite = _update_document(doc, manifest, current)
+    else:
+        manifest.files = {}
+        roms = sorted(current)
+
+    # cue/gdi/m3u 묶음: 구성 파일은 묶음 게임 하나로 바꾸고 데이터 트랙만 해시
+    targets, members = {}, {}
+    if roms:
+        targets, parents = group_disc_sets(rom_folder, sorted(current))
+        for member, parent in parents.items():
+            members.setdefault(parent, []).append(member)
+        roms = sorted({parents.get(rom, rom) for rom in roms} - parents.keys())
+
+    progress = ScanProgress(len(roms))
+    if doc is None:
+        # 임시 파일은 스캔 직전에 연다 (그 전 단계의 예외로 ROM 폴더에 .tmp가 남지 않게)
+        writer = MetadataWriter(out_file)
+
+    def seen(rom):
+        # 매니페스트에는 게임 항목이 실제로 기록된 ROM만 올린다 (취소되면 나머지는 다음에 다시)
+        manifest.files[rom] = current[rom]
+        for member in members.get(rom, ()):
+            if member in current:
+                manifest.files[member] = current[member]
+
+    def on_hashed(rom, size, crc):
+        if not crc:
+            # CRC를 못 얻은 파일(ROM이 아닌 파일, 읽기 오류)은 게임 항목 없이 기록만
+            seen(rom)
+        progress.add(size)
+        if on_progress:
+            on_progress(progress)
+
+    try:
+        if writer is not None:
+            writer.write_record(collection_record(chosen))
+        for rom, inner, crc, info in scan(rom_folder, chosen["exts"], store, lookup_batch, roms=roms,
+                                          workers=workers, cancel=cancel, on_hashed=on_hashed,
+                                          lookup_hashes=lookup_hashes, targets=targets,
+                                          executor=executor, io_gate=io_gate):
+            # 못 찾은 ROM은 파일 이름을 제목으로 두고, 수동 매핑 창이 이를 미매핑으로 본다
+            name = info['name'] if info else fallback_title(rom)
+            developer = (info['developer'] or "") if info else ""
+            description = (info['description'] or "") if info else ""
+            if writer is not None:
+                writer.write_record(make_game(name, rom, developer=developer, description=description))
+            else:
+                game = doc.find_by_file(rom)
+                if game is None:
+                    new_games.append(doc.add_game(name, rom, developer=developer, description=description))
+                elif info:
+                    _apply_info(doc, game, info)
+                    rewrite = True
+            seen(rom)
+            if on_result:
+                on_result(rom, name)
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+
+    cancelled = cancel is not None and cancel.is_set()
+    if writer is not None and cancelled:
+        # 새로 만들다 취소되면 기존 파일과 매니페스트를 그대로 둔다
+        writer.abort()
+        store.flush()
+        elapsed = time.perf_counter() - started
+        METRICS.record("write_metadata", elapsed)
+        log_event("write_metadata", folder=rom_folder, ok=False, roms=len(roms), seconds=round(elapsed, 3))
+        return False
+
+    with METRICS.timer("metadata.write"):
+        if writer is not None:
+            writer.commit()
+        elif rewrite:
+            doc.save()
+        elif new_games:
+            # 추가만 있으면 기존 내용은 그대로 복사하고 새 블록만 이어 쓴다
+            with MetadataWriter(out_file, append=True) as w:
+                for game in new_games:
+                    w.write_record(game)
+    if roms or rewrite or manifest.files.keys() != current.keys():
+        manifest.save()
+    if writer is not None:
+        # 폴더 전체를 새로 훑었으므로 지워지거나 이름이 바뀐 ROM의 해시 행을 정리한다
+        with METRICS.timer("hashstore.prune"):
+            store.prune(rom_folder)
+    store.flush()
+    ok = not cancelled
+    elapsed = time.perf_counter() - started
+    METRICS.record("write_metadata", elapsed)
+    log_event("write_metadata", folder=rom_folder, ok=ok, roms=len(roms), seconds=round(elapsed, 3))
+    return ok
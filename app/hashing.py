@@ -0,0 +1,47 @@
+import os, hashlib, threading, zlib
+from collections import namedtuple
+
+# ---------------------------
+# 파일 해시 엔진
+# ---------------------------
+# 큰 버퍼 하나에 readinto로 읽고 memoryview 조각을 그대로 넘겨 복사를 피한다.
+# CRC32/MD5/SHA1을 한 번 읽으면서 같이 계산한다 (모두 큰 버퍼에서 GIL을 놓는다).
+# 버퍼는 스레드마다 하나를 재사용하고 파일 크기만큼만 쓴다. 파일마다 8 MiB를 새로
+# 할당하면 0으로 채우는 동안 GIL을 잡고 있어 작은 ROM에서는 오히려 느려진다.
+HASH_BUFFER = 8 * 1024 * 1024
+MIN_BUFFER = 64 * 1024
+
+FileHashes = namedtuple("FileHashes", "crc md5 sha1")
+
+_local = threading.local()
+
+
+def _buffer(size):
+    buf = getattr(_local, "buf", None)
+    if buf is None or len(buf) < size:
+        buf = _local.buf = bytearray(size)
+    return memoryview(buf)[:size]
+
+
+def hash_file(path, md5=False, sha1=False, buffer_size=HASH_BUFFER):
+    crc = 0
+    h_md5 = hashlib.md5() if md5 else None
+    h_sha1 = hashlib.sha1() if sha1 else None
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        view = _buffer(min(buffer_size, max(size, MIN_BUFFER)))
+        while True:
+            n = f.readinto(view)
+            if not n:
+                break
+            chunk = view[:n]
+            crc = zlib.crc32(chunk, crc)
+            if h_md5 is not None:
+                h_md5.update(chunk)
+            if h_sha1 is not None:
+                h_sha1.update(chunk)
+    return FileHashes(
+        "%08X" % (crc & 0xFFFFFFFF),
+        h_md5.hexdigest().upper() if h_md5 is not None else None,
+        h_sha1.hexdigest().upper() if h_sha1 is not None else None,
+    )
@@ -0,0 +1,155 @@
+import os, json, sqlite3, threading
+from app.metrics import METRICS
+
+# ---------------------------
+# CRC 해시 저장소 (SQLite/WAL)
+# ---------------------------
+# (path, entry, size, mtime_ns) 가 같으면 파일을 다시 읽지 않는다.
+# 쓰기는 메모리에 모았다가 batch_size 단위로 한 트랜잭션에 커밋한다.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    path     TEXT    NOT NULL,
+    entry    TEXT    NOT NULL DEFAULT '',
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    crc      TEXT    NOT NULL,
+    md5      TEXT,
+    sha1     TEXT,
+    PRIMARY KEY (path, entry)
+) WITHOUT ROWID;
+"""
+
+
+class HashStore:
+    def __init__(self, db_path, batch_size=1000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.db = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(hashes)")}
+        for column in ("md5", "sha1"):
+            if column not in columns:
+                self.db.execute(f"ALTER TABLE hashes ADD COLUMN {column} TEXT")
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _row(self, path, st):
+        with self._lock:
+            row = self._pending.get(path)
+            if row is None:
+                row = self.db.execute(
+                    "SELECT path, entry, size, mtime_ns, crc, md5, sha1 FROM hashes "
+                    "WHERE path = ? AND size = ? AND mtime_ns = ?",
+                    (path, st.st_size, st.st_mtime_ns)).fetchone()
+        if row and row[2] == st.st_size and row[3] == st.st_mtime_ns:
+            return row
+        return None
+
+    def get(self, path, st):
+        # st: os.stat() 결과. 크기나 mtime이 바뀌었으면 None
+        row = self._row(path, st)
+        return (row[1], row[4]) if row else None
+
+    def get_hashes(self, path, st):
+        # (crc, md5, sha1). md5/sha1은 계산한 적이 없으면 None
+        row = self._row(path, st)
+        return (row[4], row[5], row[6]) if row else None
+
+    def put(self, path, entry, st, crc, md5=None, sha1=None):
+        with self._lock:
+            self._pending[path] = (path, entry or "", st.st_size, st.st_mtime_ns, crc, md5, sha1)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        with METRICS.timer("hashstore.flush"):
+            rows = list(self._pending.values())
+            self.db.execute("BEGIN")
+            try:
+                # 같은 경로의 예전 entry 행은 새 값으로 대체
+                self.db.executemany("DELETE FROM hashes WHERE path = ?", [(r[0],) for r in rows])
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO hashes (path, entry, size, mtime_ns, crc, md5, sha1) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows)
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            self._pending.clear()
+
+    def prune(self, root=None):
+        # 삭제되었거나 크기/mtime이 바뀐 파일의 행을 지운다. stat은 잠금 밖에서 한다
+        with self._lock:
+            self._flush_locked()
+            if root:
+                prefix = os.path.join(root, "")
+                rows = self.db.execute(
+                    "SELECT path, size, mtime_ns FROM hashes WHERE substr(path, 1, ?) = ?",
+                    (len(prefix), prefix)).fetchall()
+            else:
+                rows = self.db.execute("SELECT path, size, mtime_ns FROM hashes").fetchall()
+        stale = []
+        for path, size, mtime_ns in rows:
+            try:
+                st = os.stat(path)
+            except OSError:
+                stale.append((path, size, mtime_ns))
+                continue
+            if st.st_size != size or st.st_mtime_ns != mtime_ns:
+                stale.append((path, size, mtime_ns))
+        if stale:
+            with self._lock:
+                self.db.execute("BEGIN")
+                self.db.executemany(
+                    "DELETE FROM hashes WHERE path = ? AND size = ? AND mtime_ns = ?", stale)
+                self.db.execute("COMMIT")
+        METRICS.add("hashstore.pruned", len(stale))
+        return len(stale)
+
+    def migrate_json(self, json_path):
+        # 예전 crc_cache.json 형식: "경로:mtime" 또는 "경로:내부파일:mtime"
+        # 현재 파일과 mtime이 일치하는 항목만 옮기고 json은 .migrated로 이름을 바꾼다
+        with open(json_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        count = 0
+        for key, crc in cache.items():
+            head, _, mtime = key.rpartition(":")
+            try:
+                mtime = float(mtime)
+            except ValueError:
+                continue
+            path, entry = head, ""
+            if not os.path.isfile(path):
+                path, _, entry = head.rpartition(":")
+                if not path or not os.path.isfile(path):
+                    continue
+            st = os.stat(path)
+            if abs(st.st_mtime - mtime) > 1e-6:
+                continue
+            self.put(path, entry, st, crc)
+            count += 1
+        self.flush()
+        os.replace(json_path, json_path + ".migrated")
+        return count
+
+    def close(self):
+        if self.db is None:
+            return
+        self.flush()
+        self.db.close()
+        self.db = None
@@ -0,0 +1,77 @@
+import os, threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from app import config
+from app.cores import pick_core
+from app.scanner import DEFAULT_WORKERS
+
+# ---------------------------
+# 라이브러리 전체 실행
+# ---------------------------
+# 라이브러리 루트 아래에서 app.js abbr과 이름이 같은 시스템 폴더를 모두 찾아
+# 큰 폴더부터 동시에 처리한다. 해시 작업은 하나의 워커 풀을 같이 쓰고,
+# 실제 파일 읽기는 io_limit개까지만 동시에 일어난다 (HDD/NAS 보호).
+DEFAULT_PARALLEL = 8
+
+
+def folder_size(folder):
+    total = 0
+    with os.scandir(folder) as it:
+        for de in it:
+            if de.is_file():
+                total += de.stat().st_size
+    return total
+
+
+def discover_systems(library_root, cores, core_name=None):
+    # [(폴더, 코어, 크기)] 큰 폴더부터
+    systems = []
+    with os.scandir(library_root) as it:
+        for de in it:
+            if not de.is_dir():
+                continue
+            chosen = pick_core(cores, de.path, core_name)
+            if chosen is not None:
+                systems.append((de.path, chosen, folder_size(de.path)))
+    systems.sort(key=lambda s: (-s[2], s[0]))
+    return systems
+
+
+def run_library(systems, store, db, append=False, workers=None, io_limit=None,
+                parallel=DEFAULT_PARALLEL, on_start=None, on_done=None,
+                on_progress=None, on_result=None):
+    # on_start(folder, chosen), on_done(folder, ok, error),
+    # on_progress(folder, ScanProgress), on_result(folder, rom, name)
+    # 콜백은 여러 스레드에서 동시에 불린다.
+    from app.generate import write_metadata
+
+    io_gate = threading.BoundedSemaphore(io_limit) if io_limit else None
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers or DEFAULT_WORKERS,
+                            thread_name_prefix="pegasus-hash") as hash_pool, \
+            ThreadPoolExecutor(max_workers=max(1, min(parallel, len(systems))),
+                               thread_name_prefix="pegasus-folder") as folder_pool:
+
+        def run(folder, chosen):
+            if on_start:
+                on_start(folder, chosen)
+            try:
+                ok = write_metadata(folder, chosen, os.path.join(folder, config.METADATA_NAME),
+                                    store, db.lookup_many, append=append,
+                                    lookup_hashes=db.lookup_hashes, executor=hash_pool,
+                                    io_gate=io_gate,
+                                    on_progress=on_progress and partial(on_progress, folder),
+                                    on_result=on_result and partial(on_result, folder))
+                error = None
+            except Exception as e:
+                # 한 폴더의 오류(깨진 목록 파일, 인코딩, DB 오류 등)는 그 폴더만 실패로 처리
+                ok, error = False, e
+            results[folder] = ok
+            if on_done:
+                on_done(folder, ok, error)
+
+        futures = [folder_pool.submit(run, folder, chosen) for folder, chosen, _ in systems]
+        for fut in futures:
+            fut.result()
+    return results
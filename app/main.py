@@ -1,11 +1,52 @@
-from PySide6.QtWidgets import QApplication
-from PySide6.QtQml import QQmlApplicationEngine
-import sys
+import os, sys, time
 
-def run():
-    app = QApplication(sys.argv)
+# --startup-time 측정 기준 (인터프리터 기동 시간은 빠진다. 전체는 scripts/benchmark.py)
+STARTED = time.perf_counter()
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# ---------------------------
+# 메인 앱 (QML)
+# ---------------------------
+# 첫 창이 뜨기 전에는 Qt GUI/QML 모듈만 불러온다. DB, 코어 테이블, py7zr 같은 무거운 모듈은
+# 화면에서 처음 쓰는 시점에 app.* 쪽에서 불러온다 (get_registry, OpenVGDB, archives._open_7z).
+# QML은 scripts/build_ui.py로 리소스(rc_ui.py)에 넣어 두면 qrc:/에서 읽고, 없으면 파일에서 읽는다.
+# 어느 쪽이든 Qt의 QML 디스크 캐시가 컴파일 결과(.qmlc)를 재사용한다.
+UI_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ui")
+QML_RESOURCE = "qrc:/ui/MainView.qml"
+
+
+def main_qml_url():
+    from PySide6.QtCore import QUrl
+    try:
+        import app.ui.rc_ui  # noqa: F401  (리소스 등록)
+    except ImportError:
+        return QUrl.fromLocalFile(os.path.join(UI_DIR, "MainView.qml"))
+    return QUrl(QML_RESOURCE)
+
+
+def run(argv=None):
+    argv = sys.argv if argv is None else argv
+    measure = "--startup-time" in argv
+    from PySide6.QtGui import QGuiApplication
+    from PySide6.QtQml import QQmlApplicationEngine
+
+    app = QGuiApplication(argv)
     engine = QQmlApplicationEngine()
-    engine.load("app/ui/MainView.qml")
+    url = main_qml_url()
+
+    def on_created(obj, obj_url):
+        if obj is None and obj_url == url:
+            sys.exit(-1)
+        if measure and obj is not None:
+            # 첫 프레임이 그려진 시점까지의 시간(ms)을 출력하고 종료
+            def first_frame():
+                print(f"startup_ms={(time.perf_counter() - STARTED) * 1000:.1f}", flush=True)
+                app.quit()
+            obj.frameSwapped.connect(first_frame)
+
+    engine.objectCreated.connect(on_created)
+    engine.load(url)
     if not engine.rootObjects():
         sys.exit(-1)
     sys.exit(app.exec())
@@ -0,0 +1,53 @@
+import os, json
+
+# ---------------------------
+# 스캔 매니페스트
+# ---------------------------
+# ROM 폴더마다 마지막 스캔 때의 (크기, mtime_ns)를 기록해 두고
+# 업데이트 때는 바뀐 파일만 다시 처리한다.
+MANIFEST_NAME = ".pegasus-manifest.json"
+MANIFEST_VERSION = 1
+
+
+def stat_folder(folder, skip=()):
+    # {파일명: (size, mtime_ns)}
+    entries = {}
+    with os.scandir(folder) as it:
+        for de in it:
+            if de.name in skip or de.name.startswith(".") or not de.is_file():
+                continue
+            st = de.stat()
+            entries[de.name] = (st.st_size, st.st_mtime_ns)
+    return entries
+
+
+class ScanManifest:
+    def __init__(self, path, files=None):
+        self.path = path
+        self.files = files or {}
+
+    @classmethod
+    def load(cls, folder):
+        path = os.path.join(folder, MANIFEST_NAME)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, {name: tuple(v) for name, v in data.get("files", {}).items()})
+
+    def diff(self, current):
+        # (추가된 파일, 바뀐 파일, 사라진 파일)
+        old = self.files
+        added = [name for name in current if name not in old]
+        changed = [name for name, st in current.items() if name in old and old[name] != st]
+        removed = [name for name in old if name not in current]
+        return added, changed, removed
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files}, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
@@ -0,0 +1,94 @@
+import heapq, math, os, re
+from app.openvgdb import normalize_title
+
+# ---------------------------
+# 미매핑 ROM 자동 후보
+# ---------------------------
+# 파일 이름을 정규화해서(지역/리비전 태그, 확장자, No-Intro 관례 제거) 시스템별 제목 색인과
+# 단어 단위로 비교한다. 드문 단어(IDF가 큰 단어)의 역색인으로 후보를 모으고
+# 가중치 Dice 점수로 순위를 매긴다. 모든 ROM을 한 번에 처리해 상위 k개를 돌려준다.
+TOP_K = 5
+MIN_SCORE = 0.3
+# 이보다 많은 제목에 나오는 단어는 후보를 모을 때 쓰지 않는다 (점수에는 반영)
+COMMON_LIMIT = 2000
+
+# "Title (USA) (Rev 1).sfc", "Title v1.1", "Title_(Disc 1)"
+# normalize_title() 이후라 "v1.1"은 "v1 1"이 된다
+_VERSION = re.compile(r"\b(v\d+( \d+)*[a-z]?|rev [0-9a-z]+)$")
+
+
+def normalize_filename(name):
+    stem = os.path.splitext(os.path.basename(name))[0].replace("_", " ")
+    norm = normalize_title(stem)
+    return _VERSION.sub("", norm).strip()
+
+
+class TitleIndex:
+    def __init__(self, rows):
+        # rows: (title, genre, developer, system) — OpenVGDB.titles()
+        self.rows = []
+        self.norms = []
+        self.tokens = []
+        self.exact = {}
+        postings = {}
+        seen = set()
+        for row in rows:
+            norm = normalize_title(row[0])
+            if not norm or (norm, row[3]) in seen:
+                continue
+            seen.add((norm, row[3]))
+            i = len(self.rows)
+            tokens = frozenset(norm.split())
+            self.rows.append(row)
+            self.norms.append(norm)
+            self.tokens.append(tokens)
+            self.exact.setdefault(norm, i)
+            for tok in tokens:
+                postings.setdefault(tok, []).append(i)
+        n = len(self.rows)
+        self.postings = postings
+        self.idf = {tok: math.log(1 + n / len(ids)) for tok, ids in postings.items()}
+        self.unknown_idf = math.log(1 + n) if n else 1.0
+        self.weights = [sum(self.idf[t] for t in tokens) for tokens in self.tokens]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def candidates(self, name, k=TOP_K):
+        return self.match(normalize_filename(name), k)
+
+    def match(self, norm, k=TOP_K):
+        # [(점수, row)] 높은 순. 정규화 결과가 제목과 똑같으면 1.0
+        tokens = set(norm.split())
+        if not tokens:
+            return []
+        query_weight = sum(self.idf.get(t, self.unknown_idf) for t in tokens)
+        known = [t for t in tokens if t in self.postings]
+        rare = [t for t in known if len(self.postings[t]) <= COMMON_LIMIT] or known
+        ids = set()
+        for tok in rare:
+            ids.update(self.postings[tok])
+
+        scored = []
+        exact = self.exact.get(norm)
+        for i in ids:
+            if i == exact:
+                score = 1.0
+            else:
+                shared = sum(self.idf[t] for t in tokens & self.tokens[i])
+                score = 2 * shared / (query_weight + self.weights[i])
+            if score >= MIN_SCORE:
+                scored.append((score, i))
+        return [(round(score, 3), self.rows[i]) for score, i in heapq.nlargest(k, scored)]
+
+
+def rank_candidates(names, index, k=TOP_K):
+    # {파일 이름: [(점수, row)]}. 같은 정규화 이름은 한 번만 계산한다
+    by_norm = {}
+    results = {}
+    for name in names:
+        norm = normalize_filename(name)
+        if norm not in by_norm:
+            by_norm[norm] = index.match(norm, k)
+        results[name] = by_norm[norm]
+    return results
@@ -0,0 +1,265 @@
+import os
+
+# ---------------------------
+# metadata.pegasus.txt 문서 모델
+# ---------------------------
+# "key: value" 줄, 들여쓴 이어지는 줄(빈 줄은 "  ."), "#" 주석으로 이루어진다.
+# collection:/game: 줄이 새 블록을 시작한다. 한 번 읽어 메모리에서 편집하고
+# save()로 한 번에 교체 저장한다.
+WRITE_BUFFER = 1024 * 1024
+BLOCK_KEYS = ("collection", "game")
+FILE_KEYS = ("file", "files")
+COMMENT = "#"
+
+
+class Record:
+    __slots__ = ("kind", "entries")
+
+    def __init__(self, kind, value=""):
+        self.kind = kind
+        self.entries = [[kind, value]]
+
+    def __repr__(self):
+        return f"<{self.kind}: {self.title}>"
+
+    @property
+    def title(self):
+        return self.entries[0][1]
+
+    def get(self, key, default=""):
+        for k, v in self.entries:
+            if k == key:
+                return v
+        return default
+
+    def set(self, key, value):
+        for entry in self.entries:
+            if entry[0] == key:
+                entry[1] = value
+                return
+        self.entries.append([key, value])
+
+    def remove(self, key):
+        self.entries = [e for e in self.entries if e[0] != key or e is self.entries[0]]
+
+    @property
+    def files(self):
+        files = []
+        for k, v in self.entries:
+            if k in FILE_KEYS:
+                files.extend(line.strip() for line in v.split("\n") if line.strip())
+        return files
+
+
+def _value_lines(value):
+    lines = value.splitlines() or [""]
+    out = [lines[0]]
+    for line in lines[1:]:
+        out.append("  " + (line if line.strip() else "."))
+    return out
+
+
+def format_record(record):
+    lines = []
+    for key, value in record.entries:
+        if key == COMMENT:
+            lines.append(value)
+            continue
+        value_lines = _value_lines(value)
+        first = value_lines[0]
+        lines.append(f"{key}: {first}" if first else f"{key}:")
+        lines.extend(value_lines[1:])
+    return "\n".join(lines) + "\n"
+
+
+def make_game(title, file, **fields):
+    game = Record("game", title)
+    game.entries.append(["file", file])
+    for key, value in fields.items():
+        game.entries.append([key, value])
+    return game
+
+
+def fallback_title(file):
+    # OpenVGDB에서 찾지 못한 ROM에 붙이는 제목 (파일 이름에서 확장자만 뺀 것)
+    return os.path.splitext(os.path.basename(file))[0]
+
+
+def is_unmapped(game):
+    # 제목이 비었거나 fallback_title 그대로면 아직 매핑되지 않은 게임
+    title = game.title
+    return not title or any(title == fallback_title(f) for f in game.files)
+
+
+# ---------------------------
+# 기록기
+# ---------------------------
+# 임시 파일에 큰 버퍼로 한 번에 쓰고 fsync 후 os.replace로 교체한다.
+# append=True면 기존 내용을 먼저 복사한 뒤 이어 쓴다.
+# 중간에 예외가 나면 원본은 그대로 남는다.
+class MetadataWriter:
+    def __init__(self, path, append=False):
+        self.path = path
+        self.tmp = path + ".tmp"
+        self.count = 0
+        self.f = open(self.tmp, "w", encoding="utf-8", newline="\n", buffering=WRITE_BUFFER)
+        if append and os.path.exists(path):
+            with open(path, "r", encoding="utf-8", newline="") as src:
+                data = src.read()
+            if data.strip():
+                self.f.write(data if data.endswith("\n") else data + "\n")
+                self.count = 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def write_record(self, record):
+        if self.count:
+            self.f.write("\n")
+        self.f.write(format_record(record))
+        self.count += 1
+
+    def commit(self):
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.f.close()
+        os.replace(self.tmp, self.path)
+        if hasattr(os, "O_DIRECTORY"):
+            fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def abort(self):
+        self.f.close()
+        try:
+            os.remove(self.tmp)
+        except OSError:
+            pass
+
+
+class MetadataDocument:
+    def __init__(self, path=None):
+        self.path = path
+        self.records = []
+        self.by_file = {}
+        self.by_title = {}
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.parse(f.read(), path)
+
+    @classmethod
+    def parse(cls, text, path=None):
+        doc = cls(path)
+        record = None
+        preamble = Record(COMMENT, "")
+        preamble.entries = []
+        entry = None
+        for raw in text.splitlines():
+            line = raw.rstrip()
+            if not line:
+                entry = None
+                continue
+            if line[0] in " \t":
+                if entry is not None:
+                    cont = line.strip()
+                    entry[1] += "\n" + ("" if cont == "." else cont)
+                continue
+            target = record if record is not None else preamble
+            if line.startswith(COMMENT) or ":" not in line:
+                target.entries.append([COMMENT, line])
+                entry = None
+                continue
+            key, value = line.split(":", 1)
+            key, value = key.strip(), value.strip()
+            if key in BLOCK_KEYS:
+                record = Record(key, value)
+                doc.records.append(record)
+                entry = record.entries[0]
+            else:
+                entry = [key, value]
+                target.entries.append(entry)
+        if preamble.entries:
+            doc.records.insert(0, preamble)
+        doc.reindex()
+        return doc
+
+    # ----- 조회 -----
+    @property
+    def games(self):
+        return [r for r in self.records if r.kind == "game"]
+
+    @property
+    def collections(self):
+        return [r for r in self.records if r.kind == "collection"]
+
+    def reindex(self):
+        self.by_file = {}
+        self.by_title = {}
+        for r in self.records:
+            if r.kind == "game":
+                self._index(r)
+
+    def _index(self, game):
+        for name in game.files:
+            self.by_file[name] = game
+        self.by_title.setdefault(game.title, []).append(game)
+
+    def _unindex(self, game):
+        for name in game.files:
+            if self.by_file.get(name) is game:
+                del self.by_file[name]
+        same = self.by_title.get(game.title)
+        if same and game in same:
+            same.remove(game)
+            if not same:
+                del self.by_title[game.title]
+
+    def find_by_file(self, name):
+        return self.by_file.get(name)
+
+    def find_by_title(self, title):
+        return self.by_title.get(title, [])
+
+    # ----- 편집 -----
+    def add_game(self, title, file, **fields):
+        game = make_game(title, file, **fields)
+        self.records.append(game)
+        self._index(game)
+        return game
+
+    def remove(self, record):
+        if record.kind == "game":
+            self._unindex(record)
+        self.records.remove(record)
+
+    def set_field(self, record, key, value):
+        indexed = record.kind == "game" and (key in FILE_KEYS or key == record.kind)
+        if indexed:
+            self._unindex(record)
+        if key == record.kind:
+            record.entries[0][1] = value
+        else:
+            record.set(key, value)
+        if indexed:
+            self._index(record)
+
+    # ----- 저장 -----
+    def dumps(self):
+        return "\n".join(format_record(r) for r in self.records)
+
+    def save(self, path=None):
+        path = path or self.path
+        with MetadataWriter(path) as w:
+            for r in self.records:
+                w.write_record(r)
+        self.path = path
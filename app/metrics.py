@@ -0,0 +1,143 @@
+import sys, json, time, logging, threading
+from contextlib import contextmanager
+
+# ---------------------------
+# 계측 (단계별 타이머/카운터)
+# ---------------------------
+# 스캔 파이프라인 곳곳에서 METRICS에 시간과 개수를 모은다. 실행이 끝나면 snapshot()을
+# 구조화 로그 이벤트나 요약 표로 내보낸다. 모든 메서드는 여러 스레드에서 불려도 된다.
+#   hash.*      캐시 적중/실패, 해시한 바이트, 파일 해시 시간
+#   archive.*   압축 파일을 연 횟수와 헤더 읽기 시간
+#   db.*        OpenVGDB 조회 횟수와 지연
+#   metadata.*  metadata.pegasus.txt 쓰기
+log = logging.getLogger("pegasus")
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.timers = {}                     # name -> [횟수, 합계(초), 최대(초)]
+
+    def add(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, name, seconds):
+        with self._lock:
+            t = self.timers.get(name)
+            if t is None:
+                self.timers[name] = [1, seconds, seconds]
+            else:
+                t[0] += 1
+                t[1] += seconds
+                if seconds > t[2]:
+                    t[2] = seconds
+
+    @contextmanager
+    def timer(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.timers = {}
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self.counters)
+            timers = {name: {"count": c, "total_s": round(total, 6),
+                             "avg_ms": round(total / c * 1000, 4), "max_ms": round(peak * 1000, 4)}
+                      for name, (c, total, peak) in self.timers.items()}
+        hits = counters.get("hash.cache_hit", 0)
+        lookups = hits + counters.get("hash.cache_miss", 0)
+        if lookups:
+            counters["hash.cache_hit_ratio"] = round(hits / lookups, 4)
+        return {"counters": counters, "timers": timers}
+
+
+METRICS = Metrics()
+
+
+# ----- 구조화 로그 -----
+class JsonLineFormatter(logging.Formatter):
+    def format(self, record):
+        fields = {"ts": round(record.created, 3), "level": record.levelname.lower(),
+                  "event": record.getMessage()}
+        fields.update(getattr(record, "fields", {}))
+        return json.dumps(fields, ensure_ascii=False)
+
+
+def enable_logging(stream=None, level=logging.INFO):
+    # "pegasus" 로거를 JSON 한 줄 형식으로 stream(기본 stderr)에 출력
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonLineFormatter())
+    log.addHandler(handler)
+    log.setLevel(level)
+    log.propagate = False
+    return handler
+
+
+def log_event(event, **fields):
+    if log.isEnabledFor(logging.INFO):
+        log.info(event, extra={"fields": fields})
+
+
+# ----- 요약 표 -----
+def format_summary(snapshot):
+    lines = [f"{'timer':24s} {'count':>8s} {'total s':>10s} {'avg ms':>10s} {'max ms':>10s}"]
+    for name, t in sorted(snapshot["timers"].items()):
+        lines.append(f"{name:24s} {t['count']:8d} {t['total_s']:10.3f} "
+                     f"{t['avg_ms']:10.3f} {t['max_ms']:10.3f}")
+    lines.append("")
+    lines.append(f"{'counter':24s} {'value':>12s}")
+    for name, value in sorted(snapshot["counters"].items()):
+        lines.append(f"{name:24s} {value:>12}")
+    return "\n".join(lines)
+
+
+def print_summary(snapshot, file=None):
+    # rich가 있으면 표로, 없으면 고정폭 텍스트
+    file = file or sys.stderr
+    try:
+        from rich.console import Console
+        from rich.table import Table
+    except ImportError:
+        print(format_summary(snapshot), file=file)
+        return
+    table = Table(title="scan summary")
+    for column in ("stage", "count", "total s", "avg ms", "max ms"):
+        table.add_column(column, justify="left" if column == "stage" else "right")
+    for name, t in sorted(snapshot["timers"].items()):
+        table.add_row(name, str(t["count"]), f"{t['total_s']:.3f}", f"{t['avg_ms']:.3f}",
+                      f"{t['max_ms']:.3f}")
+    counters = Table(title="counters")
+    counters.add_column("counter")
+    counters.add_column("value", justify="right")
+    for name, value in sorted(snapshot["counters"].items()):
+        counters.add_row(name, str(value))
+    console = Console(file=file)
+    console.print(table)
+    console.print(counters)
+
+
+# ----- 프로파일링 -----
+@contextmanager
+def profiled(path):
+    # cProfile 결과를 path에 저장 (snakeviz, pstats로 확인). path가 없으면 아무것도 안 한다.
+    # cProfile은 현재 스레드만 보므로 해시까지 보려면 workers=0(호출 스레드에서 해시)로 실행한다.
+    if not path:
+        yield
+        return
+    import cProfile
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
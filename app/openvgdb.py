@@ -0,0 +1,316 @@
+import os, re, sqlite3, threading, unicodedata
+from pathlib import Path
+from app.metrics import METRICS
+from app.crctable import CrcTable, CrcTableError
+from app.querycache import MISSING, QueryCache, db_identity
+
+# ---------------------------
+# OpenVGDB 조회
+# ---------------------------
+# 읽기 전용(immutable) 연결 하나를 계속 쓰고, SQL 문자열을 고정해
+# sqlite3 문장 캐시가 재사용되도록 한다.
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_KIB = 64 * 1024
+IN_CHUNK = 500
+
+LOOKUP_COLUMNS = """
+    r.romHashCRC, rl.releaseTitleName, rl.releaseGenre, rl.releaseDeveloper,
+    rl.releaseDescription, rl.TEMPsystemName, r.romID
+"""
+LOOKUP_SQL = f"""
+    SELECT {LOOKUP_COLUMNS}
+    FROM ROMs r
+    JOIN RELEASES rl ON r.romID = rl.romID
+    WHERE r.romHashCRC = ?
+"""
+LOOKUP_MD5_SQL = LOOKUP_SQL.replace("r.romHashCRC = ?", "r.romHashMD5 = ?")
+LOOKUP_SHA1_SQL = LOOKUP_SQL.replace("r.romHashCRC = ?", "r.romHashSHA1 = ?")
+SEARCH_SQL = """
+    SELECT rl.releaseTitleName, rl.releaseGenre, rl.releaseDeveloper, rl.TEMPsystemName
+    FROM RELEASES rl
+    WHERE rl.releaseTitleName LIKE ?
+    LIMIT ?
+"""
+TITLES_SQL = """
+    SELECT rl.releaseTitleName, rl.releaseGenre, rl.releaseDeveloper, rl.TEMPsystemName
+    FROM RELEASES rl
+    WHERE ? IS NULL OR rl.TEMPsystemName = ?
+"""
+# 정규화 제목 위의 FTS5 테이블. 단어 접두사 검색은 releases_fts(bm25 순위),
+# 세 글자 이상 부분 문자열은 releases_trigram으로 보완한다.
+FTS_SQL = """
+    SELECT rl.releaseTitleName, rl.releaseGenre, rl.releaseDeveloper, rl.TEMPsystemName
+    FROM {table} f
+    JOIN RELEASES rl ON rl.releaseID = f.rowid
+    WHERE {table} MATCH ? AND (? IS NULL OR f.TEMPsystemName = ?)
+    ORDER BY bm25({table})
+    LIMIT ?
+"""
+FTS_PREFIX_SQL = FTS_SQL.format(table="releases_fts")
+FTS_TRIGRAM_SQL = FTS_SQL.format(table="releases_trigram")
+
+
+def _lookup_in_sql(n):
+    return f"""
+        SELECT {LOOKUP_COLUMNS}
+        FROM ROMs r
+        JOIN RELEASES rl ON r.romID = rl.romID
+        WHERE r.romHashCRC IN ({",".join("?" * n)})
+    """
+
+
+def _info(row):
+    return {
+        "name": row[1],
+        "genre": row[2],
+        "developer": row[3],
+        "description": row[4],
+        "system": row[5]
+    }
+
+
+def _open_table(table_path, db_path):
+    # 같은 DB에서 뽑은 CRC 테이블일 때만 쓴다 (없거나 오래됐으면 None -> SQLite 조회)
+    if not table_path or not os.path.exists(table_path):
+        return None
+    try:
+        table = CrcTable(table_path)
+    except (OSError, CrcTableError):
+        return None
+    if table.identity != db_identity(db_path):
+        table.close()
+        return None
+    return table
+
+
+class OpenVGDB:
+    def __init__(self, db_path, cache_path=None, table_path=None):
+        # cache_path를 주면 조회/검색 결과를 LRU에 담고 close() 때 파일로 저장한다.
+        # table_path(scripts/export_crc_table.py 결과)가 유효하면 CRC 조회는 그 테이블에서 한다.
+        self.db_path = db_path
+        self.cache = QueryCache.for_db(db_path, cache_path) if cache_path else None
+        self.table = _open_table(table_path, db_path)
+        uri = Path(db_path).resolve().as_uri() + "?mode=ro&immutable=1"
+        self.db = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=256)
+        self.db.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        self.db.execute(f"PRAGMA cache_size = -{CACHE_KIB}")
+        self.db.execute("PRAGMA query_only = 1")
+        self._lock = threading.Lock()
+        self.has_fts = self.db.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'releases_fts'").fetchone() is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def lookup(self, crc32):
+        if self.table is not None:
+            return self.table.lookup(crc32)
+        if self.cache is not None:
+            # lookup_many와 같은 캐시 항목(ambiguous 포함)을 쓴다
+            return self.lookup_many([crc32]).get(crc32)
+        with METRICS.timer("db.lookup"), self._lock:
+            row = self.db.execute(LOOKUP_SQL, (crc32,)).fetchone()
+        METRICS.add("db.queries")
+        return _info(row) if row else None
+
+    def lookup_many(self, crcs):
+        # {crc: info}. 같은 CRC가 여러 릴리스에 있으면 첫 번째 행을 쓰고,
+        # 서로 다른 ROM(romID)과 겹치면 info["ambiguous"] = True
+        if self.table is not None:
+            return self.table.lookup_many(crcs)
+        crcs = list(dict.fromkeys(crcs))
+        cached = {}
+        if self.cache is not None:
+            missing = []
+            for crc in crcs:
+                info = self.cache.get("crc:" + crc)
+                if info is MISSING:
+                    missing.append(crc)
+                elif info is not None:
+                    cached[crc] = info
+            crcs = missing
+        results = self._lookup_many(crcs) if crcs else {}
+        if self.cache is not None:
+            for crc in crcs:
+                self.cache.put("crc:" + crc, results.get(crc))
+        results.update(cached)
+        return results
+
+    def _lookup_many(self, crcs):
+        results = {}
+        rom_ids = {}
+        with METRICS.timer("db.lookup_many"), self._lock:
+            for i in range(0, len(crcs), IN_CHUNK):
+                METRICS.add("db.queries")
+                chunk = crcs[i:i + IN_CHUNK]
+                for row in self.db.execute(_lookup_in_sql(len(chunk)), chunk):
+                    crc = row[0]
+                    if crc not in results:
+                        results[crc] = _info(row)
+                        rom_ids[crc] = row[6]
+                    elif rom_ids[crc] != row[6]:
+                        results[crc]["ambiguous"] = True
+        return results
+
+    def lookup_hashes(self, md5=None, sha1=None):
+        # SHA1, MD5 순으로 찾는다
+        if self.cache is None:
+            return self._lookup_hashes(md5, sha1)
+        key = f"hash:{sha1 or ''}:{md5 or ''}".upper()
+        info = self.cache.get(key)
+        if info is MISSING:
+            info = self._lookup_hashes(md5, sha1)
+            self.cache.put(key, info)
+        return info
+
+    def _lookup_hashes(self, md5, sha1):
+        with METRICS.timer("db.lookup_hashes"), self._lock:
+            for sql, value in ((LOOKUP_SHA1_SQL, sha1), (LOOKUP_MD5_SQL, md5)):
+                if value:
+                    METRICS.add("db.queries")
+                    row = self.db.execute(sql, (value.upper(),)).fetchone()
+                    if row:
+                        return _info(row)
+        return None
+
+    def search(self, keyword, system=None, limit=20):
+        # (title, genre, developer, system) 목록
+        if self.cache is None:
+            with METRICS.timer("db.search"):
+                return self._search(keyword, system, limit)
+        key = f"search:{keyword}\x1f{system or ''}\x1f{limit}"
+        rows = self.cache.get(key)
+        if rows is MISSING:
+            with METRICS.timer("db.search"):
+                rows = self._search(keyword, system, limit)
+            self.cache.put(key, rows)
+        return [tuple(r) for r in rows]
+
+    def _search(self, keyword, system, limit):
+        METRICS.add("db.queries")
+        if not self.has_fts:
+            with self._lock:
+                return self.db.execute(SEARCH_SQL, (f"%{keyword}%", limit)).fetchall()
+        norm = normalize_title(keyword)
+        if not norm:
+            return []
+        prefix_query = " ".join(f'"{tok}"*' for tok in norm.split())
+        with self._lock:
+            rows = self.db.execute(FTS_PREFIX_SQL, (prefix_query, system, system, limit)).fetchall()
+            if not rows and len(norm) >= 3:
+                rows = self.db.execute(FTS_TRIGRAM_SQL, (f'"{norm}"', system, system, limit)).fetchall()
+        return rows
+
+    def titles(self, system=None):
+        # 자동 매칭 색인용 전체 제목 목록 (search()와 같은 열)
+        with self._lock:
+            return self.db.execute(TITLES_SQL, (system, system)).fetchall()
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.save()
+        if self.table is not None:
+            self.table.close()
+            self.table = None
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+# ---------------------------
+# 인덱스 (scripts/setup_data.py에서 생성)
+# ---------------------------
+INDEXES = {
+    "idx_roms_crc": "ROMs (romHashCRC, romID)",
+    "idx_roms_md5": "ROMs (romHashMD5, romID)",
+    "idx_roms_sha1": "ROMs (romHashSHA1, romID)",
+    "idx_releases_romid": "RELEASES (romID)",
+    "idx_releases_norm": "RELEASES (releaseTitleNormalized, TEMPsystemName)",
+}
+
+_TAGS = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+_PUNCT = re.compile(r"[\W_]+")
+_ACCENTS = re.compile("[\u0300-\u036f]")      # 라틴 문자 악센트만 (가나 탁점, 한글은 그대로)
+_ARTICLE = re.compile(r",\s*the\b|^the\s+")
+# normalize_title 규칙이 바뀌면 올린다. setup_data가 releaseTitleNormalized를 다시 채운다
+NORMALIZE_VERSION = 2
+
+
+def normalize_title(title):
+    # "Legend of Zelda, The (USA) [!]" -> "legend of zelda", "Pokémon Red" -> "pokemon red"
+    # 영문 이외의 글자(일본어, 한국어 등)도 단어로 남긴다
+    if not title:
+        return ""
+    t = _ACCENTS.sub("", unicodedata.normalize("NFKD", title.casefold()))
+    t = _TAGS.sub(" ", unicodedata.normalize("NFC", t)).strip()
+    t = _ARTICLE.sub("", t)
+    t = _PUNCT.sub(" ", t.replace("&", " and "))
+    return " ".join(t.split())
+
+
+def build_indexes(db_path, renormalize=False):
+    # renormalize: NORMALIZE_VERSION이 바뀌었을 때 이미 채워진 정규화 제목도 다시 계산
+    db = sqlite3.connect(db_path)
+    try:
+        db.create_function("normalize_title", 1, normalize_title, deterministic=True)
+        columns = {row[1] for row in db.execute("PRAGMA table_info(RELEASES)")}
+        with db:
+            if "releaseTitleNormalized" not in columns:
+                db.execute("ALTER TABLE RELEASES ADD COLUMN releaseTitleNormalized TEXT")
+            db.execute("UPDATE RELEASES SET releaseTitleNormalized = normalize_title(releaseTitleName)"
+                       + ("" if renormalize else " WHERE releaseTitleNormalized IS NULL"))
+            for name, target in INDEXES.items():
+                db.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+        db.execute("ANALYZE")
+        db.commit()
+    finally:
+        db.close()
+
+
+FTS_TABLES = {
+    "releases_fts": "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'",
+    "releases_trigram": "tokenize = 'trigram'",
+}
+
+
+def build_fts(db_path):
+    # build_indexes() 이후에 호출 (releaseTitleNormalized 컬럼 필요)
+    db = sqlite3.connect(db_path)
+    try:
+        with db:
+            for name, options in FTS_TABLES.items():
+                db.execute(f"DROP TABLE IF EXISTS {name}")
+                db.execute(f"""
+                    CREATE VIRTUAL TABLE {name} USING fts5(
+                        releaseTitleNormalized, TEMPsystemName UNINDEXED,
+                        content = 'RELEASES', content_rowid = 'releaseID', {options})
+                """)
+                db.execute(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
+                db.execute(f"INSERT INTO {name}({name}) VALUES ('optimize')")
+    finally:
+        db.close()
+
+
+def check_query_plans(db_path):
+    # 앱이 쓰는 조회문이 테이블 전체 스캔을 하는지 확인. 문제 목록을 돌려준다.
+    db = sqlite3.connect(db_path)
+    queries = {
+        "lookup": (LOOKUP_SQL, ("00000000",)),
+        "lookup_many": (_lookup_in_sql(3), ("00000000", "00000001", "00000002")),
+        "lookup md5": (LOOKUP_MD5_SQL, ("",)),
+        "lookup sha1": (LOOKUP_SHA1_SQL, ("",)),
+        "normalized title": ("SELECT releaseID FROM RELEASES WHERE releaseTitleNormalized = ?", ("",)),
+    }
+    problems = []
+    try:
+        for label, (sql, params) in queries.items():
+            for row in db.execute("EXPLAIN QUERY PLAN " + sql, params):
+                detail = row[-1]
+                if detail.startswith("SCAN") and "USING" not in detail:
+                    problems.append(f"{label}: {detail}")
+    finally:
+        db.close()
+    return problems
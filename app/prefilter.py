@@ -0,0 +1,41 @@
+import os
+
+# ---------------------------
+# 스캔 전 사전 필터
+# ---------------------------
+# 실제 폴더에는 스크린샷, 세이브, 설명 파일 같은 ROM이 아닌 파일이 많다.
+# 이름(확장자)만으로 먼저 거르고, 압축 파일은 열기 전에 앞 몇 바이트로 진짜인지 확인한다.
+ARCHIVE_MAGIC = {
+    "zip": (b"PK\x03\x04", b"PK\x05\x06"),
+    "7z": (b"7z\xbc\xaf\x27\x1c",),
+}
+SNIFF_SIZE = 8
+
+
+def extension_index(exts):
+    # 코어 확장자 목록 -> 소문자 frozenset (점 없이). 이미 인덱스면 그대로
+    if isinstance(exts, frozenset):
+        return exts
+    return frozenset(e.lower().lstrip(".") for e in exts)
+
+
+def _ext(name):
+    return os.path.splitext(name)[1].lower()[1:]
+
+
+def accepts(name, exts):
+    # 파일 이름만으로 판단 (I/O 없음). 압축 파일은 내용 확인이 필요하므로 통과시킨다
+    if name.startswith("."):
+        return False
+    ext = _ext(name)
+    return ext in ARCHIVE_MAGIC or ext in exts
+
+
+def sniff_archive(path):
+    # 확장자는 zip/7z인데 시그니처가 맞지 않으면 열지 않는다 (깨진 다운로드, 이름만 바뀐 파일)
+    magic = ARCHIVE_MAGIC.get(_ext(path))
+    if magic is None:
+        return True
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_SIZE)
+    return head.startswith(magic)
@@ -0,0 +1,100 @@
+import os, json, threading
+from collections import OrderedDict
+from app.metrics import METRICS
+
+# ---------------------------
+# OpenVGDB 조회 결과 캐시 (LRU)
+# ---------------------------
+# (종류, 질의, 시스템) -> 결과. 항목 수와 대략의 바이트 수로 크기를 제한하고
+# 오래 안 쓴 것부터 버린다. 찾지 못한 결과(None)도 저장해 같은 CRC를 다시 묻지 않는다.
+# 파일로 저장해 재시작 후에도 쓰며, openvgdb.sqlite의 크기/mtime/inode가 바뀌면 통째로 버린다.
+MAX_ENTRIES = 100000
+MAX_BYTES = 32 * 1024 * 1024
+CACHE_VERSION = 1
+MISSING = object()
+
+
+def db_identity(db_path):
+    st = os.stat(db_path)
+    return f"{st.st_size}:{st.st_mtime_ns}:{st.st_ino}"
+
+
+class QueryCache:
+    def __init__(self, identity, path=None, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.identity = identity
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()         # key -> (value, 크기)
+        self.size = 0
+        self.dirty = False
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    @classmethod
+    def for_db(cls, db_path, path=None, **kwargs):
+        return cls(db_identity(db_path), path, **kwargs)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=MISSING):
+        # 없으면 default (기본값 MISSING으로 저장된 None과 구분한다)
+        with self._lock:
+            item = self.entries.get(key)
+            if item is None:
+                METRICS.add("querycache.miss")
+                return default
+            self.entries.move_to_end(key)
+        METRICS.add("querycache.hit")
+        return item[0]
+
+    def put(self, key, value):
+        size = len(key) + len(json.dumps(value, ensure_ascii=False))
+        with self._lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self.entries[key] = (value, size)
+            self.size += size
+            self.dirty = True
+            while self.entries and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+                _, (_, dropped) = self.entries.popitem(last=False)
+                self.size -= dropped
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.size = 0
+            self.dirty = True
+
+    # ----- 파일 -----
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != CACHE_VERSION or data.get("identity") != self.identity:
+            # DB가 바뀌었으면 예전 결과는 버린다 (다음 save()에서 파일도 갱신)
+            self.dirty = True
+            return
+        for key, value in data.get("entries", []):
+            self.put(key, value)
+        self.dirty = False
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        with self._lock:
+            entries = [[key, value] for key, (value, _) in self.entries.items()]
+            self.dirty = False
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_VERSION, "identity": self.identity, "entries": entries},
+                          f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
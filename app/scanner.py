@@ -0,0 +1,184 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from app.archives import ArchiveError, inspect_archive, is_archive
+from app.hashing import FileHashes, hash_file
+from app.metrics import METRICS
+from app.prefilter import accepts, extension_index, sniff_archive
+
+# 해시 계산은 큰 버퍼에서 GIL을 놓으므로 스레드 풀로도 코어 수만큼 확장된다
+DEFAULT_WORKERS = os.cpu_count() or 4
+
+# ---------------------------
+# CRC 계산
+# ---------------------------
+def compute_crc(file_path, allowed_exts, store, st=None, io_gate=None):
+    # allowed_exts가 None이면 확장자 검사 없이 해시 (멀티 트랙 묶음의 데이터 트랙)
+    # io_gate(세마포어 등)는 캐시에 없어 실제로 파일을 읽을 때만 잡는다
+    archive = is_archive(file_path)
+    if allowed_exts is not None:
+        allowed_exts = extension_index(allowed_exts)
+        if not accepts(os.path.basename(file_path), allowed_exts):
+            return {}
+
+    if st is None:
+        st = os.stat(file_path)
+    cached = store.get(file_path, st)
+    if cached:
+        METRICS.add("hash.cache_hit")
+        entry, crc = cached
+        return {entry or os.path.basename(file_path): crc}
+    METRICS.add("hash.cache_miss")
+
+    with io_gate or nullcontext():
+        if archive:
+            if sniff_archive(file_path):
+                METRICS.add("archive.opens")
+                with METRICS.timer("archive.inspect"):
+                    found = inspect_archive(file_path, allowed_exts)
+            else:
+                METRICS.add("prefilter.bad_archive")
+                found = None
+        else:
+            with METRICS.timer("hash.file"):
+                found = "", hash_file(file_path).crc
+            METRICS.add("hash.bytes", st.st_size)
+    if found is None:
+        return {}
+    entry, crc = found
+
+    store.put(file_path, entry, st, crc)
+    return {entry or os.path.basename(file_path): crc}
+
+def file_hashes(file_path, store, st=None, io_gate=None):
+    # 압축되지 않은 파일의 CRC32/MD5/SHA1. 없으면 한 번 읽어서 셋 다 계산해 저장
+    # io_gate는 compute_crc와 같이 실제로 읽을 때만 잡는다
+    if st is None:
+        st = os.stat(file_path)
+    cached = store.get_hashes(file_path, st)
+    if cached and cached[1] and cached[2]:
+        return FileHashes(*cached)
+    with io_gate or nullcontext(), METRICS.timer("hash.full"):
+        hashes = hash_file(file_path, md5=True, sha1=True)
+    METRICS.add("hash.bytes", st.st_size)
+    store.put(file_path, "", st, hashes.crc, hashes.md5, hashes.sha1)
+    return hashes
+
+# ---------------------------
+# 스캔 파이프라인
+# ---------------------------
+# 디렉터리 열거 -> 해시(워커 풀) -> 배치 DB 조회 -> 순서대로 방출
+def list_roms(folder, skip=()):
+    names = []
+    with os.scandir(folder) as it:
+        for de in it:
+            if de.name in skip or not de.is_file():
+                continue
+            names.append(de.name)
+    names.sort()
+    return names
+
+def _hash_one(folder, rom, exts, store, target=None, io_gate=None):
+    # target: rom 대신 해시할 파일 (cue/gdi/m3u 묶음의 데이터 트랙)
+    if target is None and not accepts(rom, exts):
+        # 스크린샷, 세이브 등은 stat도 하지 않는다
+        METRICS.add("prefilter.skipped")
+        return rom, 0, None, None
+    path = os.path.join(folder, target or rom)
+    try:
+        st = os.stat(path)
+        if target and not is_archive(target):
+            crc_map = compute_crc(path, None, store, st, io_gate)
+        else:
+            crc_map = compute_crc(path, exts, store, st, io_gate)
+    except (OSError, ArchiveError):
+        return rom, 0, None, None
+    if not crc_map:
+        return rom, st.st_size, None, None
+    inner, crc = next(iter(crc_map.items()))
+    if target and not is_archive(target):
+        inner = rom
+    return rom, st.st_size, inner, crc
+
+class _InlineExecutor:
+    # workers=0: 호출 스레드에서 바로 해시 (cProfile로 compute_crc까지 보거나 디버깅할 때)
+    def submit(self, fn, *args):
+        fut = Future()
+        try:
+            fut.set_result(fn(*args))
+        except BaseException as e:
+            fut.set_exception(e)
+        return fut
+
+def _lookup(batch, lookup_batch, folder, store, lookup_hashes, targets, io_gate=None):
+    crcs = {crc for _, _, _, crc in batch if crc}
+    with METRICS.timer("scan.lookup_batch"):
+        infos = lookup_batch(sorted(crcs)) if crcs else {}
+    for rom, _, inner, crc in batch:
+        if not crc:
+            continue
+        info = infos.get(crc)
+        if info and info.get("ambiguous") and lookup_hashes and inner == rom:
+            # CRC가 여러 ROM과 겹치면 MD5/SHA1로 다시 찾는다 (압축되지 않은 파일만)
+            path = os.path.join(folder, targets.get(rom, rom))
+            try:
+                hashes = file_hashes(path, store, io_gate=io_gate)
+            except OSError:
+                hashes = None
+            if hashes:
+                info = lookup_hashes(md5=hashes.md5, sha1=hashes.sha1) or info
+        yield rom, inner, crc, info
+
+def scan(folder, exts, store, lookup_batch, roms=None, workers=None,
+         queue_size=256, batch_size=200, cancel=None, on_hashed=None, lookup_hashes=None,
+         targets=None, executor=None, io_gate=None):
+    # lookup_batch(crcs) -> {crc: info}
+    # lookup_hashes(md5=, sha1=) -> info 는 CRC가 겹칠 때만 쓰인다.
+    # 결과는 (rom, inner, crc, info) 튜플로 roms 순서대로 나온다.
+    # 해시 단계와 조회 단계 사이의 대기열은 queue_size개로 제한된다.
+    # cancel(threading.Event)이 설정되면 새 작업을 넣지 않고 멈춘다.
+    # on_hashed(rom, size, crc)는 ROM 하나의 해시가 끝날 때마다 호출된다 (crc는 못 얻으면 None).
+    # targets({rom: 해시할 파일})는 discsets.group_disc_sets()의 결과.
+    # executor를 주면 여러 폴더가 그 풀을 같이 쓰고(workers 무시), io_gate는 compute_crc 참고.
+    # workers=0이면 스레드 없이 호출 스레드에서 해시한다.
+    if roms is None:
+        roms = list_roms(folder)
+    targets = targets or {}
+    exts = extension_index(exts)
+    if executor is None and workers == 0:
+        executor = _InlineExecutor()
+    workers = workers or DEFAULT_WORKERS
+    pending = deque()
+    batch = []
+
+    def take():
+        item = pending.popleft().result()
+        if on_hashed:
+            on_hashed(item[0], item[1], item[3])
+        batch.append(item)
+
+    with nullcontext(executor) if executor is not None else ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="pegasus-hash") as pool:
+        try:
+            for rom in roms:
+                if cancel is not None and cancel.is_set():
+                    return
+                pending.append(pool.submit(_hash_one, folder, rom, exts, store, targets.get(rom), io_gate))
+                while len(pending) >= queue_size:
+                    take()
+                    if len(batch) >= batch_size:
+                        yield from _lookup(batch, lookup_batch, folder, store, lookup_hashes, targets, io_gate)
+                        batch.clear()
+            while pending:
+                if cancel is not None and cancel.is_set():
+                    return
+                take()
+                if len(batch) >= batch_size:
+                    yield from _lookup(batch, lookup_batch, folder, store, lookup_hashes, targets, io_gate)
+                    batch.clear()
+            if batch:
+                yield from _lookup(batch, lookup_batch, folder, store, lookup_hashes, targets, io_gate)
+        finally:
+            for fut in pending:
+                fut.cancel()
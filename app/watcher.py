@@ -0,0 +1,221 @@
+import os, sys, time, select, struct, threading
+import ctypes, ctypes.util
+
+from app import config
+from app.cli import emit, main as cli_main, run_folder
+from app.cores import pick_core
+from app.manifest import MANIFEST_NAME, stat_folder
+
+# ---------------------------
+# 폴더 감시
+# ---------------------------
+# 리눅스에서는 inotify로 이벤트가 올 때까지 잠들어 있고, 그 외 환경이나
+# inotify가 이벤트를 주지 않는 네트워크 공유(NFS/SMB)는 주기적으로 stat 해서 비교한다.
+# 네트워크 공유는 /proc/self/mounts의 파일시스템 종류로 알아내 폴더별로 폴링으로 돌린다.
+# 이벤트가 debounce초 동안 잠잠해지면 그 폴더만 증분 업데이트한다.
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+# 다른 호스트가 바꾼 내용을 inotify가 알려주지 않는 파일시스템
+NETWORK_FS = frozenset(("nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "afs", "ceph", "glusterfs",
+                        "fuse.sshfs", "fuse.rclone"))
+POLL_INTERVAL = 5.0
+
+
+def _ignored(name):
+    # 우리가 직접 쓰는 파일은 이벤트에서 뺀다
+    return (not name or name.startswith(".") or name.endswith(".tmp")
+            or name == config.METADATA_NAME or name == MANIFEST_NAME)
+
+
+def filesystem_type(folder, mounts="/proc/self/mounts"):
+    # folder가 들어 있는 마운트의 파일시스템 종류. 알 수 없으면 None
+    path = os.path.realpath(folder)
+    best, fstype = "", None
+    try:
+        with open(mounts, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                point = fields[1].replace("\\040", " ")
+                inside = path == point or path.startswith(point.rstrip("/") + "/")
+                if inside and len(point) >= len(best):
+                    best, fstype = point, fields[2]
+    except OSError:
+        return None
+    return fstype
+
+
+def is_network_fs(folder):
+    return filesystem_type(folder) in NETWORK_FS
+
+
+class InotifySource:
+    def __init__(self, folders):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.folders = {}
+        for folder in folders:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {folder}")
+            self.folders[wd] = folder
+
+    def wait(self, timeout):
+        # 바뀐 폴더 집합. timeout 동안 이벤트가 없으면 빈 집합
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "replace")
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    changed.update(self.folders.values())
+                elif wd in self.folders and not _ignored(name):
+                    changed.add(self.folders[wd])
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingSource:
+    def __init__(self, folders, interval):
+        self.interval = interval
+        self.snapshots = {folder: self._snapshot(folder) for folder in folders}
+        self.next_poll = time.monotonic() + interval
+
+    @staticmethod
+    def _snapshot(folder):
+        try:
+            return {k: v for k, v in stat_folder(folder).items() if not _ignored(k)}
+        except OSError:
+            return None
+
+    def wait(self, timeout, stop):
+        delay = max(0.0, self.next_poll - time.monotonic())
+        if stop.wait(min(timeout, delay) if timeout is not None else delay):
+            return set()
+        if time.monotonic() < self.next_poll:
+            return set()
+        return self.poll()
+
+    def poll(self):
+        self.next_poll = time.monotonic() + self.interval
+        changed = set()
+        for folder, old in self.snapshots.items():
+            new = self._snapshot(folder)
+            if new != old:
+                self.snapshots[folder] = new
+                changed.add(folder)
+        return changed
+
+    def close(self):
+        pass
+
+
+def watch(folders, update, debounce=2.0, poll_interval=POLL_INTERVAL, use_inotify=True, stop=None):
+    # update(folder)는 이벤트가 잠잠해진 폴더마다 한 번 호출된다
+    stop = stop or threading.Event()
+    source = None
+    polled = list(folders)
+    if use_inotify and sys.platform.startswith("linux"):
+        polled = [folder for folder in folders if is_network_fs(folder)]
+        local = [folder for folder in folders if folder not in polled]
+        if polled:
+            emit("watch_poll", folders=polled, interval=poll_interval, reason="network filesystem")
+        if local:
+            try:
+                source = InotifySource(local)
+            except OSError as e:
+                emit("watch_poll", folders=list(folders), interval=poll_interval,
+                     reason=f"inotify unavailable ({e})")
+                polled = list(folders)
+    poller = PollingSource(polled, poll_interval) if polled else None
+
+    pending = {}
+    try:
+        while not stop.is_set():
+            timeout = None
+            if pending:
+                timeout = max(0.0, debounce - (time.monotonic() - max(pending.values())))
+            if source is not None:
+                wait = 5.0 if timeout is None else min(timeout, 5.0)
+                if poller is not None:
+                    wait = min(wait, max(0.0, poller.next_poll - time.monotonic()))
+                changed = source.wait(wait)
+                if poller is not None and time.monotonic() >= poller.next_poll:
+                    changed |= poller.poll()
+            else:
+                changed = poller.wait(timeout, stop)
+            now = time.monotonic()
+            for folder in changed:
+                pending[folder] = now
+            for folder, last in list(pending.items()):
+                if now - last >= debounce:
+                    del pending[folder]
+                    update(folder)
+    finally:
+        for src in (source, poller):
+            if src is not None:
+                src.close()
+
+
+def run_watch(args, cores):
+    # pegasus-meta watch. 공통 옵션(--db, --hash-db, --crc-table, --query-cache)을 그대로 쓰고
+    # 갱신 결과는 다른 명령과 같은 JSON 이벤트(start/progress/done/error)로 출력한다
+    from app.hashstore import HashStore
+    from app.openvgdb import OpenVGDB
+
+    jobs = {}
+    for folder in args.folders:
+        folder = os.path.abspath(folder)
+        chosen = pick_core(cores, folder, args.core)
+        if chosen is None:
+            emit("error", folder=folder, message="no core for folder")
+            return 1
+        jobs[folder] = chosen
+
+    with HashStore(args.hash_db) as store, OpenVGDB(args.db, args.query_cache, args.crc_table) as db:
+        def update(folder):
+            # run_folder는 폴더 오류를 error/done 이벤트로 남기고 돌아오므로 감시는 계속된다.
+            # 실패한 폴더는 다음 변경 이벤트에서 다시 시도한다.
+            run_folder(folder, jobs[folder], store, db, True, None)
+
+        # 시작할 때 한 번 맞춰 두고 감시를 시작
+        for folder in jobs:
+            update(folder)
+        emit("watch", folders=list(jobs), debounce=args.debounce)
+        try:
+            watch(list(jobs), update, debounce=args.debounce, poll_interval=args.interval,
+                  use_inotify=not args.poll)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def main(argv=None):
+    # python -m app.watcher FOLDER... == pegasus-meta watch FOLDER...
+    argv = sys.argv[1:] if argv is None else argv
+    return cli_main(["watch", *argv])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
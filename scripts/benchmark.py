@@ -0,0 +1,320 @@
+from pathlib import Path
+import argparse, json, os, platform, random, sqlite3, subprocess, sys, tempfile, time, zipfile, zlib
+
+ROOT = Path(__file__).resolve().parents[1]
+
+sys.path.insert(0, str(ROOT))
+from app.crctable import export_crc_table
+from app.generate import write_metadata
+from app.hashing import hash_file
+from app.hashstore import HashStore
+from app.metadata import MetadataDocument, MetadataWriter, make_game
+from app.openvgdb import OpenVGDB, build_fts, build_indexes
+from app.querycache import db_identity
+from app.scanner import compute_crc
+
+# ---------------------------
+# 벤치마크
+# ---------------------------
+# 합성 ROM 라이브러리(낱개, zip, 7z, 큰 sparse 파일)와 OpenVGDB 모양의 SQLite를 만들고
+# 단계별 처리량과 p50/p99 지연을 JSON으로 남긴다. --baseline으로 이전 결과와 비교한다.
+#   python scripts/benchmark.py --out bench.json
+#   python scripts/benchmark.py --baseline bench.json --max-regression 0.2
+# 기동 시간(startup_*)은 새 프로세스로 잰다. 첫 창(startup_ui)이 --max-startup-ms를 넘으면 실패.
+SYSTEM = "Game Boy Advance"
+CHOSEN = {"fullname": "GBA (mGBA)", "sysname": SYSTEM, "exts": ["gba"], "abbr": "gba",
+          "core": "mgba_libretro_android.so"}
+WORDS = ["super", "mario", "zelda", "legend", "final", "fantasy", "street", "fighter", "sonic",
+         "metroid", "kart", "world", "advance", "star", "wars", "dragon", "quest", "castle"]
+
+
+# ----- 합성 데이터 -----
+def make_library(folder, count, size, seed=0):
+    # 낱개/zip/7z를 섞은 폴더. (파일 이름, CRC) 목록을 돌려준다
+    rnd = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    try:
+        import py7zr
+    except ImportError:
+        py7zr = None
+    roms = []
+    for i in range(count):
+        data = rnd.randbytes(size)
+        inner = f"game{i:05d}.gba"
+        kind = i % 3
+        if kind == 1:
+            name = f"game{i:05d}.zip"
+            with zipfile.ZipFile(os.path.join(folder, name), "w", zipfile.ZIP_DEFLATED) as z:
+                z.writestr(inner, data)
+        elif kind == 2 and py7zr is not None:
+            name = f"game{i:05d}.7z"
+            with py7zr.SevenZipFile(os.path.join(folder, name), "w") as z:
+                z.writestr(data, inner)
+        else:
+            name = inner
+            with open(os.path.join(folder, name), "wb") as f:
+                f.write(data)
+        roms.append((name, "%08X" % zlib.crc32(data)))
+    return roms
+
+
+def make_sparse(path, size):
+    # 실제로 디스크를 쓰지 않는 큰 파일 (해시 루프 자체의 처리량)
+    with open(path, "wb") as f:
+        f.truncate(size)
+    return path
+
+
+def make_openvgdb(path, crcs, titles, seed=0):
+    # scripts/setup_data.py가 만드는 것과 같은 인덱스/FTS까지 포함
+    rnd = random.Random(seed)
+    if os.path.exists(path):
+        os.remove(path)
+    db = sqlite3.connect(path)
+    db.executescript("""
+        CREATE TABLE ROMs (romID INTEGER PRIMARY KEY, romHashCRC TEXT, romHashMD5 TEXT,
+                           romHashSHA1 TEXT, romFileName TEXT);
+        CREATE TABLE RELEASES (releaseID INTEGER PRIMARY KEY, romID INTEGER, releaseTitleName TEXT,
+                               TEMPsystemName TEXT, releaseDescription TEXT,
+                               releaseDeveloper TEXT, releaseGenre TEXT);
+    """)
+    crcs = list(crcs)
+    with db:
+        for i in range(max(titles, len(crcs))):
+            crc = crcs[i] if i < len(crcs) else "%08X" % rnd.getrandbits(32)
+            title = " ".join(rnd.choice(WORDS).title() for _ in range(rnd.randint(2, 4))) + f" {i}"
+            db.execute("INSERT INTO ROMs VALUES (?, ?, ?, ?, ?)",
+                       (i + 1, crc, "%032X" % rnd.getrandbits(128), "%040X" % rnd.getrandbits(160),
+                        title + ".gba"))
+            db.execute("INSERT INTO RELEASES VALUES (NULL, ?, ?, ?, ?, ?, ?)",
+                       (i + 1, title, SYSTEM, "desc " + title, "Dev", "Action"))
+    db.close()
+    build_indexes(path)
+    build_fts(path)
+
+
+# ----- 측정 -----
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+def measure(fn, items, size_of=None):
+    # items마다 fn(item) 한 번. 지연은 ms, 처리량은 초당 개수/바이트
+    latencies = []
+    total_bytes = 0
+    started = time.perf_counter()
+    for item in items:
+        t = time.perf_counter()
+        fn(item)
+        latencies.append((time.perf_counter() - t) * 1000)
+        if size_of:
+            total_bytes += size_of(item)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    result = {
+        "ops": len(latencies),
+        "seconds": round(elapsed, 6),
+        "ops_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 4),
+        "p99_ms": round(percentile(latencies, 0.99), 4),
+    }
+    if size_of:
+        result["bytes_per_sec"] = round(total_bytes / elapsed) if elapsed else 0
+    return result
+
+
+def run(args, work):
+    stages = {}
+    lib = os.path.join(work, "gba")
+    roms = make_library(lib, args.roms, args.rom_size * 1024)
+    paths = [os.path.join(lib, name) for name, _ in roms]
+    crcs = [crc for _, crc in roms]
+    db_path = os.path.join(work, "openvgdb.sqlite")
+    make_openvgdb(db_path, crcs, args.titles)
+    exts = ["gba"]
+    size_of = os.path.getsize
+
+    def by_ext(ext):
+        return [p for p in paths if p.endswith(ext)]
+
+    with HashStore(os.path.join(work, "hashes.sqlite")) as store:
+        for label, ext in (("crc_loose", ".gba"), ("crc_zip", ".zip"), ("crc_7z", ".7z")):
+            items = by_ext(ext)
+            if items:
+                stages[label] = measure(lambda p: compute_crc(p, exts, store), items, size_of)
+        store.flush()
+        stages["crc_cached"] = measure(lambda p: compute_crc(p, exts, store), paths, size_of)
+
+    if args.sparse_gb:
+        sparse = make_sparse(os.path.join(work, "big.iso"), int(args.sparse_gb * 1024 ** 3))
+        stages["hash_sparse"] = measure(hash_file, [sparse], size_of)
+        os.remove(sparse)
+
+    rnd = random.Random(1)
+    table_path = os.path.join(work, "openvgdb.crc")
+    export_crc_table(db_path, table_path, db_identity(db_path))
+
+    with OpenVGDB(db_path) as db:
+        sample = [rnd.choice(crcs) for _ in range(args.queries)]
+        stages["lookup"] = measure(db.lookup, sample)
+        batches = [crcs[i:i + 200] for i in range(0, len(crcs), 200)]
+        stages["lookup_many_200"] = measure(db.lookup_many, batches)
+        keywords = [rnd.choice(WORDS)[:rnd.randint(2, 6)] for _ in range(args.queries)]
+        stages["search"] = measure(db.search, keywords)
+
+    # mmap CRC 테이블 (scripts/export_crc_table.py)
+    with OpenVGDB(db_path, table_path=table_path) as table_db:
+        stages["lookup_table"] = measure(table_db.lookup, sample)
+        stages["lookup_many_table_200"] = measure(table_db.lookup_many, batches)
+
+    # 같은 질의를 LRU 캐시를 거쳐 두 번 (두 번째는 dict 조회만)
+    with OpenVGDB(db_path, os.path.join(work, "query_cache.json")) as cached_db:
+        for crc in sample:
+            cached_db.lookup(crc)
+        for kw in keywords:
+            cached_db.search(kw)
+        stages["lookup_cached"] = measure(cached_db.lookup, sample)
+        stages["search_cached"] = measure(cached_db.search, keywords)
+
+    with OpenVGDB(db_path) as db:
+
+        # 폴더 전체 생성 (열거 + 해시 + 일괄 조회 + 쓰기), 빈 해시 캐시에서
+        folder_bytes = sum(size_of(p) for p in paths)
+        with HashStore(os.path.join(work, "scan.sqlite")) as store:
+            stages["scan_generate"] = measure(
+                lambda _: write_metadata(lib, CHOSEN, os.path.join(lib, "metadata.pegasus.txt"), store,
+                                         db.lookup_many, lookup_hashes=db.lookup_hashes),
+                [None], lambda _: folder_bytes)
+
+    meta_path = os.path.join(work, "metadata.pegasus.txt")
+    games = [make_game(f"Game Title {i}", f"game{i:05d}.gba", developer="Dev",
+                       description="line one\nline two") for i in range(args.games)]
+
+    def write(_):
+        with MetadataWriter(meta_path) as w:
+            for game in games:
+                w.write_record(game)
+
+    stages["metadata_write"] = measure(write, range(args.repeat), lambda _: os.path.getsize(meta_path))
+    stages["metadata_parse"] = measure(lambda _: MetadataDocument.load(meta_path), range(args.repeat),
+                                       lambda _: os.path.getsize(meta_path))
+    return stages
+
+
+# ----- 기동 시간 -----
+def startup_result(latencies):
+    latencies.sort()
+    return {"ops": len(latencies), "seconds": round(sum(latencies) / 1000, 6),
+            "ops_per_sec": round(len(latencies) * 1000 / sum(latencies), 1),
+            "p50_ms": round(percentile(latencies, 0.50), 4),
+            "p99_ms": round(percentile(latencies, 0.99), 4)}
+
+
+def run_startup(runs):
+    # 인터프리터 기동부터 잰 벽시계 시간. UI는 app/main.py --startup-time이 첫 프레임 시점을 출력한다
+    stages = {}
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    cli = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "app.cli", "--help"], cwd=ROOT, env=env,
+                       stdout=subprocess.DEVNULL, check=True)
+        cli.append((time.perf_counter() - t) * 1000)
+    stages["startup_cli"] = startup_result(cli)
+
+    try:
+        import PySide6  # noqa: F401
+    except ImportError:
+        print("[..] PySide6 not installed, skipping startup_ui")
+        return stages
+    ui = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        out = subprocess.run([sys.executable, str(ROOT / "app" / "main.py"), "--startup-time"],
+                             cwd=ROOT, env=env, capture_output=True, text=True, timeout=60).stdout
+        if "startup_ms=" not in out:
+            print("[err] app/main.py did not report startup_ms")
+            return stages
+        ui.append((time.perf_counter() - t) * 1000)
+    stages["startup_ui"] = startup_result(ui)
+    return stages
+
+
+# ----- 비교 -----
+def compare(stages, baseline, max_regression):
+    # p50이 기준보다 max_regression 비율 이상 느려진 단계 목록
+    regressions = []
+    for name, cur in stages.items():
+        base = baseline.get("stages", {}).get(name)
+        if not base or not base["p50_ms"]:
+            continue
+        ratio = cur["p50_ms"] / base["p50_ms"]
+        mark = ""
+        if ratio > 1 + max_regression:
+            regressions.append(name)
+            mark = "  <-- regression"
+        print(f"[cmp] {name:22s} p50 {base['p50_ms']:.4f} -> {cur['p50_ms']:.4f} ms (x{ratio:.2f}){mark}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="스캔/해시/조회/메타데이터 벤치마크")
+    parser.add_argument("--out", help="결과 JSON 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--work", help="합성 데이터 폴더 (기본: 임시 폴더)")
+    parser.add_argument("--roms", type=int, default=300)
+    parser.add_argument("--rom-size", type=int, default=256, help="ROM 하나 크기 (KiB)")
+    parser.add_argument("--sparse-gb", type=float, default=2.0, help="0이면 생략")
+    parser.add_argument("--titles", type=int, default=20000)
+    parser.add_argument("--games", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--startup-runs", type=int, default=5, help="0이면 생략")
+    parser.add_argument("--max-startup-ms", type=float, default=300.0, help="첫 창 p50 상한")
+    args = parser.parse_args(argv)
+
+    if args.work:
+        os.makedirs(args.work, exist_ok=True)
+        stages = run(args, args.work)
+    else:
+        with tempfile.TemporaryDirectory(prefix="pegasus-bench-") as work:
+            stages = run(args, work)
+    if args.startup_runs:
+        stages.update(run_startup(args.startup_runs))
+
+    for name, r in stages.items():
+        rate = f"{r['bytes_per_sec'] / 1024 ** 2:9.1f} MiB/s" if "bytes_per_sec" in r else " " * 15
+        print(f"[ok] {name:22s} {r['ops']:6d} ops {r['ops_per_sec']:10.1f}/s {rate}  "
+              f"p50 {r['p50_ms']:.4f} ms  p99 {r['p99_ms']:.4f} ms")
+
+    result = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "params": {k: v for k, v in vars(args).items() if k not in ("out", "baseline", "work")},
+        },
+        "stages": stages,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"[ok] saved: {args.out}")
+    status = 0
+    ui = stages.get("startup_ui")
+    if ui and ui["p50_ms"] > args.max_startup_ms:
+        print(f"[err] startup_ui p50 {ui['p50_ms']:.1f} ms > {args.max_startup_ms:.0f} ms")
+        status = 1
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(stages, baseline, args.max_regression):
+            status = 1
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,21 @@
+from pathlib import Path
+import shutil, subprocess
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+QRC = ROOT / "app" / "ui" / "ui.qrc"
+OUT = ROOT / "app" / "ui" / "rc_ui.py"
+
+# QML을 Qt 리소스로 묶어 app/ui/rc_ui.py를 만든다. app/main.py는 이 모듈이 있으면 qrc:/에서 읽는다.
+# QML 파일을 고친 뒤 다시 실행하세요.
+
+def main():
+    rcc = shutil.which("pyside6-rcc")
+    if rcc is None:
+        print("[err] pyside6-rcc not found (pip install PySide6)")
+        sys.exit(1)
+    subprocess.run([rcc, str(QRC), "-o", str(OUT)], check=True)
+    print(f"[ok] compiled {QRC.name} -> {OUT}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+DB = ROOT / "data" / "openvgdb.sqlite"
+OUT = ROOT / "data" / "openvgdb.crc"
+
+sys.path.insert(0, str(ROOT))
+from app.crctable import export_crc_table
+from app.querycache import db_identity
+
+# OpenVGDB -> CRC 조회 전용 mmap 테이블. setup_data.py 마지막 단계에서도 불린다.
+#   python scripts/export_crc_table.py [openvgdb.sqlite] [openvgdb.crc]
+
+def export(db=DB, out=OUT):
+    if not Path(db).exists():
+        print(f"[err] missing db: {db}")
+        sys.exit(1)
+    count = export_crc_table(str(db), str(out), db_identity(db))
+    print(f"[ok] {count} CRCs -> {out}")
+
+def main():
+    db = Path(sys.argv[1]) if len(sys.argv) > 1 else DB
+    out = Path(sys.argv[2]) if len(sys.argv) > 2 else OUT
+    export(db, out)
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,148 @@
 from pathlib import Path
-import zipfile
+import json, os, sqlite3, zipfile, zlib
 import sys
 
 ROOT = Path(__file__).resolve().parents[1]
 ZIP = ROOT / "data" / "openvgdb.zip"
 OUT = ROOT / "data" / "openvgdb.sqlite"
+STAMP = ROOT / "data" / "openvgdb.stamp.json"
+CRC_TABLE = ROOT / "data" / "openvgdb.crc"
 
-def main():
-    if OUT.exists():
-        print(f"[ok] already exists: {OUT}")
-        return
-    if not ZIP.exists():
-        print(f"[err] missing zip: {ZIP}")
-        sys.exit(1)
-    with zipfile.ZipFile(ZIP, "r") as zf:
+sys.path.insert(0, str(ROOT))
+from app.hashing import hash_file
+from app.openvgdb import NORMALIZE_VERSION, build_indexes, build_fts, check_query_plans
+from app.querycache import db_identity
+from export_crc_table import export as export_crc_table
+
+# ---------------------------
+# 설치 상태 기록
+# ---------------------------
+# STAMP에 원본 zip의 SHA1과 진행 단계("extracted" -> "indexed")를 남긴다.
+# 중간에 끊기면 다음 실행에서 끝나지 않은 단계부터 다시 하고,
+# 새 openvgdb.zip이 들어오면 다시 풀고 인덱스도 다시 만든다.
+COPY_BUFFER = 8 * 1024 * 1024
+
+def load_stamp(stamp=STAMP):
+    try:
+        with open(stamp, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_stamp(data, stamp=STAMP):
+    tmp = Path(str(stamp) + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, stamp)
+
+def zip_identity(zip_path, stamp):
+    # zip 크기/mtime이 기록과 같으면 SHA1을 다시 계산하지 않는다
+    st = os.stat(zip_path)
+    if stamp.get("zip_size") == st.st_size and stamp.get("zip_mtime_ns") == st.st_mtime_ns:
+        return stamp["zip_sha1"], st
+    return hash_file(zip_path, sha1=True).sha1, st
+
+# ---------------------------
+# 압축 해제
+# ---------------------------
+def quick_check(db_path):
+    db = sqlite3.connect(f"file:{Path(db_path).as_posix()}?mode=ro", uri=True)
+    try:
+        return db.execute("PRAGMA quick_check").fetchone()[0] == "ok"
+    except sqlite3.DatabaseError:
+        return False
+    finally:
+        db.close()
+
+def stream_extract(zip_path, out_path):
+    # 임시 파일에 큰 버퍼로 풀면서 CRC를 계산하고, 검증이 끝난 뒤에만 out_path로 바꾼다
+    part = Path(str(out_path) + ".part")
+    with zipfile.ZipFile(zip_path, "r") as zf:
         # zip 안에 있는 첫 번째 파일을 꺼내서 openvgdb.sqlite로 저장
-        names = zf.namelist()
-        if not names:
+        members = [i for i in zf.infolist() if not i.is_dir()]
+        if not members:
             print("[err] empty zip")
             sys.exit(1)
-        tmp = ROOT / "data" / names[0]
-        zf.extract(names[0], ROOT / "data")
-        tmp.rename(OUT)
-    print(f"[ok] extracted to {OUT}")
+        info = members[0]
+        crc = 0
+        try:
+            with zf.open(info) as src, open(part, "wb") as dst:
+                while True:
+                    chunk = src.read(COPY_BUFFER)
+                    if not chunk:
+                        break
+                    crc = zlib.crc32(chunk, crc)
+                    dst.write(chunk)
+                dst.flush()
+                os.fsync(dst.fileno())
+        except (zipfile.BadZipFile, zlib.error) as e:
+            # 기존 openvgdb.sqlite는 그대로 둔다
+            part.unlink(missing_ok=True)
+            print(f"[err] broken zip: {e}")
+            sys.exit(1)
+    if crc != info.CRC:
+        part.unlink()
+        print(f"[err] CRC mismatch: {info.filename} ({crc:08X} != {info.CRC:08X})")
+        sys.exit(1)
+    if not quick_check(part):
+        part.unlink()
+        print(f"[err] quick_check failed: {info.filename}")
+        sys.exit(1)
+    # 예전 DB의 WAL/SHM이 남아 있으면 새 파일에 잘못 붙을 수 있다
+    for suffix in ("-wal", "-shm"):
+        Path(str(out_path) + suffix).unlink(missing_ok=True)
+    os.replace(part, out_path)
+    return info.filename, "%08X" % crc
+
+def extract(zip_path=ZIP, out_path=OUT, stamp_path=STAMP):
+    # 새로 풀었으면 True. 기록(zip SHA1)과 같은 DB가 이미 있으면 False
+    stamp = load_stamp(stamp_path)
+    if not Path(zip_path).exists():
+        if Path(out_path).exists():
+            # zip 없이 DB만 있는 경우: 검증할 원본이 없으므로 그대로 쓴다
+            print(f"[ok] already exists: {out_path}")
+            return False
+        print(f"[err] missing zip: {zip_path}")
+        sys.exit(1)
+
+    sha1, st = zip_identity(zip_path, stamp)
+    if Path(out_path).exists() and stamp.get("zip_sha1") == sha1:
+        print(f"[ok] already exists: {out_path}")
+        return False
+
+    if stamp.get("zip_sha1") and stamp["zip_sha1"] != sha1:
+        print("[..] new openvgdb.zip detected, re-extracting")
+    member, crc = stream_extract(zip_path, out_path)
+    save_stamp({"zip_sha1": sha1, "zip_size": st.st_size, "zip_mtime_ns": st.st_mtime_ns,
+                "member": member, "crc": crc, "stage": "extracted"}, stamp_path)
+    print(f"[ok] extracted to {out_path}")
+    return True
+
+def main():
+    extracted = extract()
+    stamp = load_stamp()
+    normalized = stamp.get("normalize") == NORMALIZE_VERSION
+    # zip 없이 DB만 둔 경우에도 기록된 DB(크기/mtime)와 같으면 다시 만들지 않는다
+    same_db = stamp.get("db") == db_identity(OUT)
+    if not extracted and stamp.get("stage") == "indexed" and normalized and same_db and CRC_TABLE.exists():
+        print(f"[ok] indexes ready: {OUT}")
+        return
+    # CRC/MD5/SHA1 조회 인덱스, 정규화 제목 컬럼, ANALYZE
+    # 정규화 규칙이 바뀌었으면 이미 채워진 제목도 다시 계산한다
+    build_indexes(OUT, renormalize=not normalized)
+    # 수동 매핑 창의 제목 검색용 FTS5 테이블
+    build_fts(OUT)
+    problems = check_query_plans(OUT)
+    if problems:
+        for p in problems:
+            print(f"[err] full table scan: {p}")
+        sys.exit(1)
+    print(f"[ok] indexes ready: {OUT}")
+    # DB 수정이 모두 끝난 뒤에 뽑아야 식별자(크기/mtime)가 맞는다
+    export_crc_table(OUT, CRC_TABLE)
+    # zip 없이 DB만 있어 기록이 비어 있어도 남긴다 (그렇지 않으면 매번 다시 만든다)
+    stamp.update(stage="indexed", normalize=NORMALIZE_VERSION, db=db_identity(OUT))
+    save_stamp(stamp)
 
 if __name__ == "__main__":
     main()
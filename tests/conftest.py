@@ -0,0 +1,46 @@
+import sqlite3
+
+import pytest
+
+from app.openvgdb import build_fts, build_indexes
+
+# ---------------------------
+# 공용 픽스처
+# ---------------------------
+RELEASES = [
+    # (CRC, 제목, 시스템)
+    ("1A2B3C4D", "Pokémon Red Version", "Nintendo Game Boy"),
+    ("2B3C4D5E", "Legend of Zelda, The", "Nintendo Entertainment System"),
+    ("3C4D5E6F", "ポケットモンスター 赤", "Nintendo Game Boy"),
+    ("4D5E6F70", "Super Mario Bros.", "Nintendo Entertainment System"),
+    ("4D5E6F70", "Super Mario Bros. (Rerelease)", "Nintendo Entertainment System"),
+]
+
+
+def make_openvgdb(path, releases=RELEASES):
+    # scripts/setup_data.py와 같은 인덱스/FTS를 갖춘 작은 OpenVGDB. 같은 CRC는 같은 ROM
+    db = sqlite3.connect(path)
+    db.executescript("""
+        CREATE TABLE ROMs (romID INTEGER PRIMARY KEY, romHashCRC TEXT, romHashMD5 TEXT,
+                           romHashSHA1 TEXT, romFileName TEXT);
+        CREATE TABLE RELEASES (releaseID INTEGER PRIMARY KEY, romID INTEGER, releaseTitleName TEXT,
+                               TEMPsystemName TEXT, releaseDescription TEXT,
+                               releaseDeveloper TEXT, releaseGenre TEXT);
+    """)
+    rom_ids = {}
+    with db:
+        for crc, title, system in releases:
+            if crc not in rom_ids:
+                rom_ids[crc] = len(rom_ids) + 1
+                db.execute("INSERT INTO ROMs VALUES (?, ?, NULL, NULL, ?)", (rom_ids[crc], crc, title))
+            db.execute("INSERT INTO RELEASES VALUES (NULL, ?, ?, ?, ?, ?, ?)",
+                       (rom_ids[crc], title, system, "desc", "Dev", "RPG"))
+    db.close()
+    build_indexes(path)
+    build_fts(path)
+    return path
+
+
+@pytest.fixture
+def openvgdb_path(tmp_path):
+    return make_openvgdb(str(tmp_path / "openvgdb.sqlite"))
@@ -0,0 +1,99 @@
+import sqlite3
+import struct
+
+import pytest
+
+from app.crctable import HEADER, HEADER_SIZE, MAGIC, RECORD, CrcTable, CrcTableError, export_crc_table
+from app.openvgdb import OpenVGDB
+from app.querycache import db_identity
+
+# ---------------------------
+# CRC 테이블 (mmap)
+# ---------------------------
+
+
+@pytest.fixture
+def table_path(openvgdb_path, tmp_path):
+    # 다른 ROM(romID)이 같은 CRC를 가지면 ambiguous로 표시된다
+    db = sqlite3.connect(openvgdb_path)
+    with db:
+        db.execute("INSERT INTO ROMs VALUES (99, '2b3c4d5e', NULL, NULL, 'hack.nes')")
+        db.execute("INSERT INTO RELEASES (romID, releaseTitleName) VALUES (99, 'Zelda Hack')")
+        db.execute("INSERT INTO ROMs VALUES (100, 'not hex', NULL, NULL, 'bad.nes')")
+    db.close()
+    path = str(tmp_path / "openvgdb.crc")
+    assert export_crc_table(openvgdb_path, path, db_identity(openvgdb_path)) == 4
+    return path
+
+
+def test_binary_layout(table_path):
+    with open(table_path, "rb") as f:
+        data = f.read()
+    magic, _, n, keys_off, records_off, strings_off, _ = HEADER.unpack_from(data, 0)
+    assert magic == MAGIC and n == 4
+    assert keys_off == HEADER_SIZE
+    assert records_off == keys_off + n * 4
+    assert strings_off == records_off + n * RECORD.size
+    keys = struct.unpack_from(f"={n}I", data, keys_off)
+    assert list(keys) == sorted(keys)
+    flags, off, length = RECORD.unpack_from(data, records_off)
+    assert data[strings_off + off:strings_off + off + length].decode("utf-8").split("\0")[0] \
+        == "Pokémon Red Version"
+    assert len(data) == strings_off + sum(
+        RECORD.unpack_from(data, records_off + i * RECORD.size)[2] for i in range(n))
+
+
+def test_lookup(table_path, openvgdb_path):
+    with CrcTable(table_path) as table:
+        assert len(table) == 4
+        assert table.identity == db_identity(openvgdb_path)
+        info = table.lookup("1a2b3c4d")
+        assert info == {"name": "Pokémon Red Version", "genre": "RPG", "developer": "Dev",
+                        "description": "desc", "system": "Nintendo Game Boy"}
+        assert table.lookup("FFFFFFFF") is None
+        # 같은 ROM의 여러 릴리스는 첫 릴리스, 다른 ROM과 겹치면 ambiguous
+        assert table.lookup("4D5E6F70")["name"] == "Super Mario Bros."
+        assert "ambiguous" not in table.lookup("4D5E6F70")
+        zelda = table.lookup("2B3C4D5E")
+        assert zelda["name"] == "Legend of Zelda, The" and zelda["ambiguous"]
+
+
+def test_lookup_many_matches_sqlite(table_path, openvgdb_path):
+    crcs = ["4D5E6F70", "1A2B3C4D", "FFFFFFFF", "3C4D5E6F", "1A2B3C4D"]
+    with CrcTable(table_path) as table:
+        found = table.lookup_many(crcs)
+    assert set(found) == {"1A2B3C4D", "3C4D5E6F", "4D5E6F70"}
+    with OpenVGDB(openvgdb_path) as db:
+        for crc, info in found.items():
+            assert db.lookup(crc)["name"] == info["name"]
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"PGCRC",
+    b"NOTACRC\x00" + bytes(HEADER_SIZE),
+])
+def test_rejects_broken_file(tmp_path, data):
+    path = tmp_path / "broken.crc"
+    path.write_bytes(data)
+    with pytest.raises(CrcTableError):
+        CrcTable(str(path))
+
+
+def test_rejects_truncated_file(table_path, tmp_path):
+    with open(table_path, "rb") as f:
+        data = f.read()
+    path = tmp_path / "truncated.crc"
+    path.write_bytes(data[:HEADER_SIZE + 6])
+    with pytest.raises(CrcTableError):
+        CrcTable(str(path))
+
+
+def test_openvgdb_ignores_stale_table(table_path, openvgdb_path, tmp_path):
+    with OpenVGDB(openvgdb_path, table_path=table_path) as db:
+        assert db.table is not None
+    # 다른 DB에서 뽑은 테이블은 쓰지 않고 SQLite로 조회한다
+    export_crc_table(openvgdb_path, table_path, "other")
+    with OpenVGDB(openvgdb_path, table_path=table_path) as db:
+        assert db.table is None
+        assert db.lookup("1A2B3C4D")["name"] == "Pokémon Red Version"
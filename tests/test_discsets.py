@@ -0,0 +1,96 @@
+from app.discsets import group_disc_sets, parse_cue, parse_gdi, parse_m3u
+
+# ---------------------------
+# cue/gdi/m3u 묶음
+# ---------------------------
+
+
+def _write(folder, name, text="", data=b""):
+    path = folder / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if text:
+        path.write_text(text, encoding="utf-8")
+    else:
+        path.write_bytes(data)
+    return path
+
+
+CUE = """FILE "Game (Track 1).bin" BINARY
+  TRACK 01 MODE2/2352
+    INDEX 01 00:00:00
+FILE "Game (Track 2).bin" BINARY
+  TRACK 02 AUDIO
+    INDEX 01 00:00:00
+"""
+
+
+def test_parse_cue_quoted(tmp_path):
+    path = _write(tmp_path, "Game.cue", CUE)
+    assert parse_cue(path) == [("Game (Track 1).bin", "MODE2/2352"), ("Game (Track 2).bin", "AUDIO")]
+
+
+def test_parse_cue_unquoted(tmp_path):
+    path = _write(tmp_path, "Game.cue", "FILE game.bin BINARY\n  TRACK 01 MODE1/2352\n")
+    assert parse_cue(path) == [("game.bin", "MODE1/2352")]
+
+
+def test_parse_cue_unclosed_quote_is_skipped(tmp_path):
+    path = _write(tmp_path, "Game.cue",
+                  'FILE "Game (Track 1).bin BINARY\n  TRACK 01 MODE2/2352\n'
+                  'FILE "Game (Track 2).bin" BINARY\n  TRACK 02 AUDIO\n')
+    assert parse_cue(path) == [("Game (Track 2).bin", "AUDIO")]
+
+
+def test_parse_gdi(tmp_path):
+    path = _write(tmp_path, "Game.gdi",
+                  "3\n1 0 4 2352 track01.bin 0\n2 600 0 2352 \"track 02.raw\" 0\n"
+                  "3 45000 4 2352 track03.bin 0\n")
+    assert parse_gdi(path) == [("track01.bin", True), ("track 02.raw", False), ("track03.bin", True)]
+
+
+def test_parse_m3u_skips_comments(tmp_path):
+    path = _write(tmp_path, "Game.m3u", "#EXTM3U\nGame (Disc 1).cue\n\nGame (Disc 2).cue\n")
+    assert parse_m3u(path) == ["Game (Disc 1).cue", "Game (Disc 2).cue"]
+
+
+def test_group_cue(tmp_path):
+    _write(tmp_path, "Game.cue", CUE)
+    _write(tmp_path, "Game (Track 1).bin", data=b"data")
+    _write(tmp_path, "Game (Track 2).bin", data=b"audio")
+    names = sorted(p.name for p in tmp_path.iterdir())
+    targets, parents = group_disc_sets(str(tmp_path), names)
+    assert targets == {"Game.cue": "Game (Track 1).bin"}
+    assert parents == {"Game (Track 1).bin": "Game.cue", "Game (Track 2).bin": "Game.cue"}
+
+
+def test_group_gdi_picks_largest_data_track(tmp_path):
+    _write(tmp_path, "Game.gdi", "3\n1 0 4 2352 track01.bin 0\n2 600 0 2352 track02.raw 0\n"
+                                 "3 45000 4 2352 track03.bin 0\n")
+    _write(tmp_path, "track01.bin", data=b"x" * 10)
+    _write(tmp_path, "track02.raw", data=b"x" * 1000)
+    _write(tmp_path, "track03.bin", data=b"x" * 100)
+    targets, parents = group_disc_sets(str(tmp_path), sorted(p.name for p in tmp_path.iterdir()))
+    assert targets == {"Game.gdi": "track03.bin"}
+    assert set(parents) == {"track01.bin", "track02.raw", "track03.bin"}
+
+
+def test_group_m3u_of_cues(tmp_path):
+    for disc in (1, 2):
+        _write(tmp_path, f"Game (Disc {disc}).cue",
+               f'FILE "Game (Disc {disc}).bin" BINARY\n  TRACK 01 MODE2/2352\n')
+        _write(tmp_path, f"Game (Disc {disc}).bin", data=b"disc")
+    _write(tmp_path, "Game.m3u", "Game (Disc 1).cue\nGame (Disc 2).cue\n")
+    targets, parents = group_disc_sets(str(tmp_path), sorted(p.name for p in tmp_path.iterdir()))
+    # 게임은 m3u 하나, 해시는 첫 디스크의 데이터 트랙
+    assert targets == {"Game.m3u": "Game (Disc 1).bin"}
+    assert set(parents) == {"Game (Disc 1).cue", "Game (Disc 2).cue",
+                            "Game (Disc 1).bin", "Game (Disc 2).bin"}
+    assert set(parents.values()) == {"Game.m3u"}
+
+
+def test_group_malformed_cue_does_not_raise(tmp_path):
+    _write(tmp_path, "Bad.cue", 'FILE "Bad (Track 1).bin BINARY\n  TRACK 01 MODE2/2352\n')
+    _write(tmp_path, "Bad (Track 1).bin", data=b"data")
+    _write(tmp_path, "Other.bin", data=b"x")
+    targets, parents = group_disc_sets(str(tmp_path), sorted(p.name for p in tmp_path.iterdir()))
+    assert targets == {} and parents == {}
@@ -0,0 +1,95 @@
+import json
+import os
+
+from app.hashstore import HashStore
+
+# ---------------------------
+# CRC 해시 저장소
+# ---------------------------
+
+
+def _rom(tmp_path, name, data=b"rom"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_put_get_persist(tmp_path):
+    rom = _rom(tmp_path, "a.gb")
+    st = os.stat(rom)
+    db = str(tmp_path / "hashes.sqlite")
+    with HashStore(db) as store:
+        store.put(rom, "", st, "1A2B3C4D")
+        # 커밋 전에도 보류 중인 값을 돌려준다
+        assert store.get(rom, st) == ("", "1A2B3C4D")
+    with HashStore(db) as store:
+        assert store.get(rom, st) == ("", "1A2B3C4D")
+        assert store.get_hashes(rom, st) == ("1A2B3C4D", None, None)
+        store.put(rom, "", st, "1A2B3C4D", "md5", "sha1")
+        assert store.get_hashes(rom, st) == ("1A2B3C4D", "md5", "sha1")
+
+
+def test_changed_file_misses(tmp_path):
+    rom = _rom(tmp_path, "a.gb")
+    st = os.stat(rom)
+    with HashStore(str(tmp_path / "hashes.sqlite")) as store:
+        store.put(rom, "", st, "1A2B3C4D")
+        store.flush()
+        _rom(tmp_path, "a.gb", b"longer rom")
+        assert store.get(rom, os.stat(rom)) is None
+
+
+def test_new_entry_replaces_old(tmp_path):
+    # zip 안의 ROM이 바뀌면 같은 경로의 예전 entry 행은 남지 않는다
+    rom = _rom(tmp_path, "a.zip")
+    st = os.stat(rom)
+    db = str(tmp_path / "hashes.sqlite")
+    with HashStore(db) as store:
+        store.put(rom, "old.gb", st, "11111111")
+        store.flush()
+        store.put(rom, "new.gb", st, "22222222")
+    with HashStore(db) as store:
+        assert store.get(rom, st) == ("new.gb", "22222222")
+        assert store.db.execute("SELECT COUNT(*) FROM hashes").fetchone()[0] == 1
+
+
+def test_prune(tmp_path):
+    folder = tmp_path / "gb"
+    folder.mkdir()
+    kept = _rom(folder, "kept.gb")
+    deleted = _rom(folder, "deleted.gb")
+    changed = _rom(folder, "changed.gb")
+    other = _rom(tmp_path, "other.gb")
+    with HashStore(str(tmp_path / "hashes.sqlite")) as store:
+        for path in (kept, deleted, changed, other):
+            store.put(path, "", os.stat(path), "1A2B3C4D")
+        os.remove(deleted)
+        os.remove(other)
+        _rom(folder, "changed.gb", b"changed rom")
+        # root 밖의 행은 건드리지 않는다
+        assert store.prune(str(folder)) == 2
+        rows = {row[0] for row in store.db.execute("SELECT path FROM hashes")}
+        assert rows == {kept, other}
+        assert store.prune() == 1
+
+
+def test_migrate_json(tmp_path):
+    rom = _rom(tmp_path, "a.gb")
+    zipped = _rom(tmp_path, "b.zip")
+    stale = _rom(tmp_path, "c.gb")
+    cache = {
+        f"{rom}:{os.stat(rom).st_mtime}": "1A2B3C4D",
+        f"{zipped}:inner.gb:{os.stat(zipped).st_mtime}": "2B3C4D5E",
+        f"{stale}:{os.stat(stale).st_mtime - 10}": "3C4D5E6F",
+        f"{tmp_path / 'missing.gb'}:1.0": "4D5E6F70",
+        "broken": "00000000",
+    }
+    json_path = tmp_path / "crc_cache.json"
+    json_path.write_text(json.dumps(cache), encoding="utf-8")
+    with HashStore(str(tmp_path / "hashes.sqlite")) as store:
+        assert store.migrate_json(str(json_path)) == 2
+        assert store.get(rom, os.stat(rom)) == ("", "1A2B3C4D")
+        assert store.get(zipped, os.stat(zipped)) == ("inner.gb", "2B3C4D5E")
+        assert store.get(stale, os.stat(stale)) is None
+    assert not json_path.exists()
+    assert (tmp_path / "crc_cache.json.migrated").exists()
@@ -0,0 +1,112 @@
+import os
+
+from app.generate import _update_document
+from app.manifest import MANIFEST_NAME, ScanManifest, stat_folder
+from app.metadata import MetadataDocument
+
+# ---------------------------
+# 스캔 매니페스트 / 증분 업데이트
+# ---------------------------
+
+
+def _touch(folder, name, data=b"rom"):
+    path = os.path.join(folder, name)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_stat_folder_skips_hidden_and_dirs(tmp_path):
+    _touch(tmp_path, "a.gb")
+    _touch(tmp_path, "metadata.pegasus.txt")
+    _touch(tmp_path, MANIFEST_NAME)
+    (tmp_path / "sub").mkdir()
+    entries = stat_folder(str(tmp_path), skip={"metadata.pegasus.txt"})
+    assert list(entries) == ["a.gb"]
+    assert entries["a.gb"][0] == 3
+
+
+def test_diff():
+    manifest = ScanManifest("m", {"same.gb": (1, 10), "changed.gb": (1, 10), "gone.gb": (1, 10)})
+    current = {"same.gb": (1, 10), "changed.gb": (2, 20), "new.gb": (1, 10)}
+    assert manifest.diff(current) == (["new.gb"], ["changed.gb"], ["gone.gb"])
+
+
+def test_save_and_load(tmp_path):
+    manifest = ScanManifest.load(str(tmp_path))
+    assert manifest.files == {}
+    manifest.files = {"a.gb": (3, 123)}
+    manifest.save()
+    assert ScanManifest.load(str(tmp_path)).files == {"a.gb": (3, 123)}
+    assert not (tmp_path / (MANIFEST_NAME + ".tmp")).exists()
+
+
+def test_load_ignores_broken_or_old(tmp_path):
+    path = tmp_path / MANIFEST_NAME
+    path.write_text("{not json", encoding="utf-8")
+    assert ScanManifest.load(str(tmp_path)).files == {}
+    path.write_text('{"version": 0, "files": {"a.gb": [1, 2]}}', encoding="utf-8")
+    assert ScanManifest.load(str(tmp_path)).files == {}
+
+
+DOC = """\
+collection: Game Boy
+
+game: Kept
+file: kept.gb
+
+game: Changed
+file: changed.gb
+
+game: Gone
+file: gone.gb
+
+game: Disc Set
+files:
+  set (Disc 1).gb
+  set (Disc 2).gb
+"""
+
+
+def test_update_document_add_change_remove():
+    doc = MetadataDocument.parse(DOC)
+    manifest = ScanManifest("m", {
+        "kept.gb": (1, 1), "changed.gb": (1, 1), "gone.gb": (1, 1),
+        "set (Disc 1).gb": (1, 1), "set (Disc 2).gb": (1, 1),
+    })
+    current = {
+        "kept.gb": (1, 1), "changed.gb": (2, 2), "new.gb": (1, 1),
+        "set (Disc 1).gb": (1, 1),
+    }
+    roms, rewrite = _update_document(doc, manifest, current)
+    assert roms == ["changed.gb", "new.gb"]
+    assert rewrite
+    # 사라진 파일의 game 블록은 지우고, 묶음은 남은 디스크가 있으면 유지
+    assert doc.find_by_file("gone.gb") is None
+    assert [g.title for g in doc.games] == ["Kept", "Changed", "Disc Set"]
+    assert "gone.gb" not in manifest.files
+    assert "set (Disc 2).gb" not in manifest.files
+
+
+def test_update_document_records_existing_entries_without_manifest():
+    # 매니페스트 없이 만들어진 문서: 이미 항목이 있는 파일은 다시 해시하지 않는다
+    doc = MetadataDocument.parse(DOC)
+    manifest = ScanManifest("m")
+    current = {"kept.gb": (1, 1), "changed.gb": (1, 1), "new.gb": (1, 1),
+               "set (Disc 1).gb": (1, 1), "set (Disc 2).gb": (1, 1)}
+    roms, rewrite = _update_document(doc, manifest, current)
+    assert roms == ["new.gb"]
+    # 문서에만 있고 폴더에 없는 gone.gb는 정리된다
+    assert rewrite
+    assert doc.find_by_file("gone.gb") is None
+    assert manifest.files["kept.gb"] == (1, 1)
+    assert "new.gb" not in manifest.files
+
+
+def test_update_document_nothing_changed():
+    doc = MetadataDocument.parse(DOC)
+    files = {"kept.gb": (1, 1), "changed.gb": (1, 1), "gone.gb": (1, 1),
+             "set (Disc 1).gb": (1, 1), "set (Disc 2).gb": (1, 1)}
+    manifest = ScanManifest("m", dict(files))
+    assert _update_document(doc, manifest, dict(files)) == ([], False)
+    assert doc.dumps() == DOC
@@ -0,0 +1,136 @@
+from app.metadata import MetadataDocument, MetadataWriter, Record, format_record, is_unmapped, make_game
+
+# ---------------------------
+# metadata.pegasus.txt 파서/직렬화
+# ---------------------------
+SAMPLE = """\
+# Pegasus 메타데이터
+# 수동 편집 주석
+
+collection: Game Boy
+shortname: gb
+extensions: gb,zip
+launch: am start
+  -e ROM {file.path}
+  --activity-no-history
+
+game: Tetris
+file: Tetris (World).gb
+developer: Nintendo
+description: 첫 줄
+  .
+  셋째 줄
+
+game: Final Fantasy Legend
+files:
+  FFL (Disc 1).gb
+  FFL (Disc 2).gb
+# 블록 안 주석
+description: RPG
+"""
+
+
+def test_round_trip():
+    doc = MetadataDocument.parse(SAMPLE)
+    assert doc.dumps() == SAMPLE
+
+
+def test_continuation_and_blank_escape():
+    doc = MetadataDocument.parse(SAMPLE)
+    tetris = doc.find_by_file("Tetris (World).gb")
+    assert tetris.get("description") == "첫 줄\n\n셋째 줄"
+    launch = doc.collections[0].get("launch")
+    assert launch == "am start\n-e ROM {file.path}\n--activity-no-history"
+    # 빈 줄은 "  ."으로 다시 쓴다
+    assert "description: 첫 줄\n  .\n  셋째 줄\n" in format_record(tetris)
+
+
+def test_preamble_and_comments():
+    doc = MetadataDocument.parse(SAMPLE)
+    preamble = doc.records[0]
+    assert preamble.kind == "#"
+    assert [v for _, v in preamble.entries] == ["# Pegasus 메타데이터", "# 수동 편집 주석"]
+    assert len(doc.games) == 2 and len(doc.collections) == 1
+    ffl = doc.games[1]
+    assert ["#", "# 블록 안 주석"] in ffl.entries
+
+
+def test_files_block():
+    doc = MetadataDocument.parse(SAMPLE)
+    ffl = doc.find_by_file("FFL (Disc 2).gb")
+    assert ffl.title == "Final Fantasy Legend"
+    assert ffl.files == ["FFL (Disc 1).gb", "FFL (Disc 2).gb"]
+    assert doc.find_by_file("FFL (Disc 1).gb") is ffl
+
+
+def test_add_change_remove_keeps_indexes():
+    doc = MetadataDocument.parse(SAMPLE)
+    game = doc.add_game("Dr. Mario", "Dr. Mario (World).gb", developer="Nintendo")
+    assert doc.find_by_file("Dr. Mario (World).gb") is game
+    assert doc.find_by_title("Dr. Mario") == [game]
+
+    doc.set_field(game, "game", "Dr. Mario DX")
+    assert doc.find_by_title("Dr. Mario") == []
+    assert doc.find_by_title("Dr. Mario DX") == [game]
+
+    doc.set_field(game, "file", "Dr. Mario (Rev 1).gb")
+    assert doc.find_by_file("Dr. Mario (World).gb") is None
+    assert doc.find_by_file("Dr. Mario (Rev 1).gb") is game
+
+    doc.set_field(game, "developer", "Intelligent Systems")
+    assert game.get("developer") == "Intelligent Systems"
+    assert doc.find_by_file("Dr. Mario (Rev 1).gb") is game
+
+    doc.remove(game)
+    assert doc.find_by_file("Dr. Mario (Rev 1).gb") is None
+    assert doc.find_by_title("Dr. Mario DX") == []
+    assert doc.dumps() == SAMPLE
+
+
+def test_record_remove_keeps_kind_entry():
+    game = make_game("Tetris", "Tetris.gb", developer="Nintendo")
+    game.remove("developer")
+    game.remove("game")
+    assert game.entries == [["game", "Tetris"], ["file", "Tetris.gb"]]
+
+
+def test_is_unmapped():
+    assert is_unmapped(make_game("Tetris (World)", "Tetris (World).gb"))
+    assert is_unmapped(make_game("", "Tetris (World).gb"))
+    assert not is_unmapped(make_game("Tetris", "Tetris (World).gb"))
+
+
+def test_save_and_reload(tmp_path):
+    path = str(tmp_path / "metadata.pegasus.txt")
+    doc = MetadataDocument.parse(SAMPLE, path)
+    doc.set_field(doc.games[0], "developer", "Bullet-Proof Software")
+    doc.save()
+    reloaded = MetadataDocument.load(path)
+    assert reloaded.find_by_file("Tetris (World).gb").get("developer") == "Bullet-Proof Software"
+    assert reloaded.dumps() == doc.dumps()
+    assert not (tmp_path / "metadata.pegasus.txt.tmp").exists()
+
+
+def test_writer_abort_keeps_original(tmp_path):
+    path = str(tmp_path / "metadata.pegasus.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(SAMPLE)
+    try:
+        with MetadataWriter(path) as w:
+            w.write_record(Record("collection", "Other"))
+            raise RuntimeError("중단")
+    except RuntimeError:
+        pass
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == SAMPLE
+    assert not (tmp_path / "metadata.pegasus.txt.tmp").exists()
+
+
+def test_writer_append(tmp_path):
+    path = str(tmp_path / "metadata.pegasus.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("collection: Game Boy")
+    with MetadataWriter(path, append=True) as w:
+        w.write_record(make_game("Tetris", "Tetris.gb"))
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "collection: Game Boy\n\ngame: Tetris\nfile: Tetris.gb\n"
@@ -0,0 +1,55 @@
+import pytest
+
+from app.matcher import TitleIndex, normalize_filename
+from app.openvgdb import OpenVGDB, normalize_title
+
+# ---------------------------
+# 제목 정규화/검색
+# ---------------------------
+
+
+@pytest.mark.parametrize("title, expected", [
+    ("Legend of Zelda, The (USA) [!]", "legend of zelda"),
+    ("Pokémon Red Version", "pokemon red version"),
+    ("Ōkami", "okami"),
+    ("Mario & Luigi", "mario and luigi"),
+    ("Super_Mario-Bros.", "super mario bros"),
+    ("ポケットモンスター 赤", "ポケットモンスター 赤"),
+    ("포켓몬스터 레드", "포켓몬스터 레드"),
+    ("", ""),
+])
+def test_normalize_title(title, expected):
+    assert normalize_title(title) == expected
+
+
+def test_search_folds_accents(openvgdb_path):
+    with OpenVGDB(openvgdb_path) as db:
+        assert [r[0] for r in db.search("pokemon")] == ["Pokémon Red Version"]
+        assert [r[0] for r in db.search("pokémon red")] == ["Pokémon Red Version"]
+
+
+def test_search_non_latin(openvgdb_path):
+    with OpenVGDB(openvgdb_path) as db:
+        assert [r[0] for r in db.search("ポケットモンスター")] == ["ポケットモンスター 赤"]
+
+
+def test_search_system_filter(openvgdb_path):
+    with OpenVGDB(openvgdb_path) as db:
+        assert db.search("zelda", "Nintendo Game Boy") == []
+        assert [r[0] for r in db.search("zelda", "Nintendo Entertainment System")] == ["Legend of Zelda, The"]
+
+
+def test_matcher_finds_accented_title(openvgdb_path):
+    with OpenVGDB(openvgdb_path) as db:
+        index = TitleIndex(db.titles("Nintendo Game Boy"))
+    assert normalize_filename("Pokemon - Red Version (USA, Europe) (Rev 1).gb") == "pokemon red version"
+    score, row = index.candidates("Pokemon - Red Version (USA, Europe).gb")[0]
+    assert row[0] == "Pokémon Red Version" and score == 1.0
+
+
+def test_lookup(openvgdb_path):
+    with OpenVGDB(openvgdb_path) as db:
+        assert db.lookup("1A2B3C4D")["name"] == "Pokémon Red Version"
+        assert db.lookup("FFFFFFFF") is None
+        found = db.lookup_many(["1A2B3C4D", "4D5E6F70", "FFFFFFFF"])
+        assert set(found) == {"1A2B3C4D", "4D5E6F70"}
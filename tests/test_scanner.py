@@ -0,0 +1,56 @@
+import threading
+import zlib
+
+import app.scanner as scanner
+from app.hashstore import HashStore
+from app.scanner import scan
+
+# ---------------------------
+# 스캔 파이프라인
+# ---------------------------
+
+
+class Gate:
+    # 잡힌 동안 읽기가 일어났는지 기록하는 io_gate
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.held = False
+        self.entered = 0
+
+    def __enter__(self):
+        self.lock.acquire()
+        self.held = True
+        self.entered += 1
+
+    def __exit__(self, *exc):
+        self.held = False
+        self.lock.release()
+
+
+def test_collision_rehash_holds_io_gate(tmp_path, monkeypatch):
+    data = b"ambiguous rom"
+    (tmp_path / "a.gb").write_bytes(data)
+    crc = "%08X" % zlib.crc32(data)
+    gate = Gate()
+    reads = []
+
+    def hash_file(path, *args, **kwargs):
+        reads.append((kwargs.get("md5", False), gate.held))
+        return real_hash_file(path, *args, **kwargs)
+
+    real_hash_file = scanner.hash_file
+    monkeypatch.setattr(scanner, "hash_file", hash_file)
+
+    def lookup_batch(crcs):
+        return {c: {"name": "CRC match", "ambiguous": True} for c in crcs}
+
+    def lookup_hashes(md5=None, sha1=None):
+        return {"name": "MD5 match"}
+
+    with HashStore(str(tmp_path / "hashes.sqlite")) as store:
+        results = list(scan(str(tmp_path), ["gb"], store, lookup_batch, roms=["a.gb"], workers=0,
+                            lookup_hashes=lookup_hashes, io_gate=gate))
+    assert results == [("a.gb", "a.gb", crc, {"name": "MD5 match"})]
+    # CRC 해시와 MD5/SHA1 전체 읽기 모두 io_gate 안에서
+    assert reads == [(False, True), (True, True)]
+    assert gate.entered == 2
@@ -0,0 +1,39 @@
+import os, sys, time, statistics, subprocess
+from pathlib import Path
+
+import pytest
+
+# ---------------------------
+# 기동 시간
+# ---------------------------
+# 새 프로세스로 몇 번 띄워 중앙값이 예산 안에 드는지 본다 (scripts/benchmark.py의 startup_*와 같은 측정).
+ROOT = Path(__file__).resolve().parents[1]
+STARTUP_BUDGET_MS = 300      # 첫 창
+CLI_BUDGET_MS = 100          # 명령줄 (Qt를 불러오지 않는다)
+RUNS = 3
+
+
+def _env():
+    return dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+
+
+def _median_ms(cmd):
+    times = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        out = subprocess.run(cmd, cwd=ROOT, env=_env(), capture_output=True, text=True,
+                             timeout=60, check=True).stdout
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times), out
+
+
+def test_cli_startup():
+    ms, _ = _median_ms([sys.executable, "-m", "app.cli", "--help"])
+    assert ms < CLI_BUDGET_MS, f"pegasus-meta --help took {ms:.0f} ms"
+
+
+def test_first_window_startup():
+    pytest.importorskip("PySide6")
+    ms, out = _median_ms([sys.executable, str(ROOT / "app" / "main.py"), "--startup-time"])
+    assert "startup_ms=" in out
+    assert ms < STARTUP_BUDGET_MS, f"first window took {ms:.0f} ms"